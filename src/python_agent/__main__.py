@@ -0,0 +1,11 @@
+"""Module entry point so the CLI can run as ``python -m python_agent``.
+
+Keywords: main, entry point, module, CLI
+"""
+
+import sys
+
+from python_agent.cli import main
+
+if __name__ == "__main__":
+    sys.exit(main())
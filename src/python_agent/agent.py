@@ -3,13 +3,91 @@
 Keywords: agent, litellm, conversation, chat, model, AI
 """
 
-from typing import Any
-
-import litellm
+import asyncio
+import hashlib
+import importlib.util
+import json
+import sys
+import time
+from collections import OrderedDict
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from typing import Any, TextIO
 
 from python_agent.bash_tool import BashTool
+from python_agent.config import AgentConfig
+from python_agent.semantic_cache import SemanticCache
 from python_agent.session import Session, SessionManager
 
+RESPONSE_CACHE_SIZE = 128
+PROMPT_CACHE_MODEL_PREFIXES = ("claude-", "anthropic/")
+COMPACT_KEEP_MESSAGES = 6
+STREAM_PREFIX = "Agent: "
+STREAM_FLUSH_INTERVAL = 0.05
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 32
+HTTP_MAX_CONNECTIONS = 64
+_EXIT_WORDS = frozenset({"exit", "quit", "bye"})
+SUMMARY_PREFIX = "Summary: "
+SUMMARY_INSTRUCTION = (
+    "Summarize the following conversation concisely. Preserve facts, "
+    "decisions, file names, commands and open questions needed to continue."
+)
+
+
+def _litellm() -> Any:
+    """Import litellm on first use and memoize it as a module global.
+
+    litellm pulls in many provider SDKs, so deferring the import keeps CLI
+    startup (--help, argument errors, session listing) fast.
+    """
+    module = globals().get("litellm")
+    if module is None:
+        import litellm as module
+
+        globals()["litellm"] = module
+    return module
+
+
+def __getattr__(name: str) -> Any:
+    """Resolve the lazily imported litellm module attribute."""
+    if name == "litellm":
+        return _litellm()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def write_stream(
+    tokens: Iterable[str], out: TextIO, chunks: list[str], prefix: str = ""
+) -> None:
+    """Write streamed tokens to out, collecting them into chunks.
+
+    Output is flushed at line breaks and at most every STREAM_FLUSH_INTERVAL
+    seconds otherwise, so text still appears live without a flush per token.
+
+    Args:
+        tokens: Response tokens as they arrive
+        out: Text stream to write to
+        chunks: List that receives every written token, so callers keep the
+            partial response if iteration is interrupted
+        prefix: Text written just before the first token, so nothing is
+            written when the stream fails before producing any
+    """
+    write = out.write
+    flush = out.flush
+    last_flush = time.monotonic()
+    try:
+        for token in tokens:
+            if prefix:
+                write(prefix)
+                prefix = ""
+            chunks.append(token)
+            write(token)
+            now = time.monotonic()
+            if "\n" in token or now - last_flush >= STREAM_FLUSH_INTERVAL:
+                flush()
+                last_flush = now
+    finally:
+        flush()
+
 
 class AgentError(Exception):
     """Base exception for agent-related errors."""
@@ -23,32 +101,157 @@ class ModelError(AgentError):
     pass
 
 
+def _cache_key(
+    model: str, messages: list[dict[str, Any]], temperature: float, max_tokens: int
+) -> str:
+    """Build a stable hash key for an exact-match response cache entry."""
+    payload = json.dumps(
+        [model, temperature, max_tokens, messages], sort_keys=True, default=str
+    )
+    return hashlib.blake2b(payload.encode("utf-8"), digest_size=16).hexdigest()
+
+
 class Agent:
     """Core agent with LiteLLM integration and conversation management."""
 
-    def __init__(self, config: dict[str, Any]) -> None:
+    def __init__(self, config: AgentConfig | dict[str, Any]) -> None:
         """Initialize agent with configuration."""
+        if not isinstance(config, AgentConfig):
+            config = AgentConfig.from_dict(config)
         self.config = config
         self.conversation_history: list[dict[str, Any]] = []
         self.session_manager = SessionManager()
         self.current_session: Session | None = None
+        self._http: Any = None
+        self._async_http: Any = None
+        self._response_cache: OrderedDict[str, str] = OrderedDict()
+        # Running token count of the first _counted_len messages of the
+        # history list _counted_history
+        self._counted_history: list[dict[str, Any]] | None = None
+        self._counted_len = 0
+        self._token_count = 0
+        self.semantic_cache: SemanticCache | None = None
+        if config.semantic_cache:
+            session_dir = config.session_dir
+            self.semantic_cache = SemanticCache(
+                threshold=config.semantic_cache_threshold,
+                path=(
+                    Path(session_dir) / "semantic_cache.jsonl" if session_dir else None
+                ),
+            )
 
         # Initialize bash tool
         self.bash_tool = BashTool(
-            confirmation_required=config.get("confirmation_required", False),
-            timeout=config.get("timeout", 30),
+            confirmation_required=config.confirmation_required,
+            timeout=config.timeout,
+            persistent_shell=config.persistent_shell,
         )
-        self.bash_tool.set_enabled(config.get("tools_enabled", True))
+        self.bash_tool.set_enabled(config.tools_enabled)
 
         # Configure LiteLLM base URL only
-        if config.get("base_url"):
-            litellm.api_base = config["base_url"]
+        if config.base_url:
+            _litellm().api_base = config.base_url
+
+    @property
+    def config(self) -> AgentConfig:
+        """Agent configuration."""
+        return self._config
+
+    @config.setter
+    def config(self, config: AgentConfig) -> None:
+        # Config is immutable, so per-call completion arguments are built once
+        # per assignment rather than on every model call
+        self._config = config
+        self._completion_kwargs: dict[str, Any] = {
+            "model": config.model,
+            "max_tokens": config.max_tokens,
+            "temperature": config.temperature,
+            "timeout": config.timeout,
+        }
+
+    def close(self) -> None:
+        """Release resources held by the agent, such as the bash process.
+
+        Raises:
+            SessionError: If a background session save failed
+        """
+        try:
+            self.session_manager.close()
+        finally:
+            self.bash_tool.close()
+            if self._http is not None:
+                self._http.close()
+                self._uninstall_client("client_session", self._http)
+                self._http = None
+
+    async def aclose(self) -> None:
+        """Close the pooled async HTTP client.
+
+        Must be awaited in the event loop that made the async model calls,
+        since pooled connections belong to that loop.
+        """
+        if self._async_http is not None:
+            await self._async_http.aclose()
+            self._uninstall_client("aclient_session", self._async_http)
+            self._async_http = None
+
+    @staticmethod
+    def _uninstall_client(name: str, client: Any) -> None:
+        """Clear a litellm client global that still points at client.
+
+        Later litellm calls in the process would otherwise be handed a
+        closed client; with the global cleared litellm creates its own.
+        """
+        litellm = globals().get("litellm")
+        if litellm is not None and getattr(litellm, name, None) is client:
+            setattr(litellm, name, None)
+
+    def _http_options(self) -> dict[str, Any]:
+        """Return keyword arguments for the pooled httpx clients."""
+        import httpx
+
+        return {
+            "http2": importlib.util.find_spec("h2") is not None,
+            "limits": httpx.Limits(
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                max_connections=HTTP_MAX_CONNECTIONS,
+            ),
+            "timeout": self.config.timeout,
+        }
+
+    def _model_api(self, asynchronous: bool = False) -> Any:
+        """Return litellm with this agent's pooled HTTP client installed.
+
+        Reusing one client keeps connections and TLS sessions alive across
+        model calls instead of setting them up per request. HTTP/2 is used
+        when the optional h2 package is installed.
+
+        Args:
+            asynchronous: Install the async client instead of the sync one
+        """
+        import httpx
+
+        litellm = _litellm()
+        if asynchronous:
+            if self._async_http is None:
+                self._async_http = httpx.AsyncClient(**self._http_options())
+            litellm.aclient_session = self._async_http
+        else:
+            if self._http is None:
+                self._http = httpx.Client(**self._http_options())
+            litellm.client_session = self._http
+        return litellm
 
     def add_message(self, role: str, content: str) -> None:
-        """Add message to conversation history."""
+        """Add message to conversation history.
+
+        The session is saved by the background writer, which coalesces
+        messages added in quick succession into one append to the log.
+        """
         self.conversation_history.append({"role": role, "content": content})
         if self.current_session:
             self.current_session.add_message(role, content)
+            self.session_manager.schedule_save(self.current_session)
 
     def start_new_session(self) -> Session:
         """Start a new conversation session."""
@@ -61,28 +264,319 @@ class Agent:
             self.current_session = self.session_manager.load_session(session_or_id)
         else:
             self.current_session = session_or_id
-        self.conversation_history = self.current_session.messages.copy()
+        self.conversation_history = self.current_session.as_llm_messages()
         return self.current_session
 
     def save_current_session(self) -> None:
-        """Save current session to disk."""
+        """Save current session to disk.
+
+        Raises:
+            SessionError: If this or an earlier background save failed
+        """
+        self.session_manager.flush()
         if self.current_session:
             self.session_manager.save_session(self.current_session)
 
+    def _input_token_budget(self) -> int:
+        """Return the input token budget for conversation history."""
+        budget = self.config.max_input_tokens
+        return budget if budget else self.config.max_tokens * 3
+
+    def _summary_request(self, messages: list[dict[str, Any]]) -> dict[str, Any]:
+        """Build completion arguments asking the summary model for a summary."""
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        return {
+            "model": self.config.summary_model or self.config.model,
+            "messages": [
+                {"role": "system", "content": SUMMARY_INSTRUCTION},
+                {"role": "user", "content": transcript},
+            ],
+            "max_tokens": self.config.max_tokens,
+            "temperature": 0,
+            "timeout": self.config.timeout,
+        }
+
+    def _summarize(self, messages: list[dict[str, Any]]) -> str:
+        """Summarize messages with the configured summary model.
+
+        Raises:
+            ModelError: If the summary request fails
+        """
+        try:
+            response = self._model_api().completion(**self._summary_request(messages))
+            return response.choices[0].message.content or ""
+        except Exception as e:
+            raise ModelError(f"History summary failed: {e}") from e
+
+    async def _asummarize(self, messages: list[dict[str, Any]]) -> str:
+        """Summarize messages with the summary model without blocking the loop.
+
+        Raises:
+            ModelError: If the summary request fails
+        """
+        try:
+            response = await self._model_api(asynchronous=True).acompletion(
+                **self._summary_request(messages)
+            )
+            return response.choices[0].message.content or ""
+        except Exception as e:
+            raise ModelError(f"History summary failed: {e}") from e
+
+    def _history_tokens(self) -> int:
+        """Return the token count of the conversation history.
+
+        Only messages appended since the last call are tokenized, so the
+        per-turn cost does not grow with the conversation. The count starts
+        over when the history list is replaced or shrinks.
+        """
+        history = self.conversation_history
+        if history is not self._counted_history or len(history) < self._counted_len:
+            self._counted_history = history
+            self._counted_len = self._token_count = 0
+        if self._counted_len < len(history):
+            self._token_count += _litellm().token_counter(
+                model=self.config.model, messages=history[self._counted_len :]
+            )
+            self._counted_len = len(history)
+        return self._token_count
+
+    def _compaction_span(self, max_input_tokens: int) -> tuple[int, int] | None:
+        """Return the slice of history to fold into a summary, if any.
+
+        Leading system messages (the stable prefix) and the last
+        COMPACT_KEEP_MESSAGES messages are kept verbatim; everything between,
+        including any earlier summary, is folded into a single summary
+        message. Nothing changes until the history exceeds the budget, so
+        provider-side prefix caches stay valid for as long as possible.
+
+        Args:
+            max_input_tokens: Token budget for the conversation history
+
+        Returns:
+            Start and end index of the messages to summarize, or None
+        """
+        history = self.conversation_history
+        if len(history) <= COMPACT_KEEP_MESSAGES:
+            return None
+        if self._history_tokens() <= max_input_tokens:
+            return None
+
+        start = 0
+        while (
+            start < len(history)
+            and history[start]["role"] == "system"
+            and not str(history[start]["content"]).startswith(SUMMARY_PREFIX)
+        ):
+            start += 1
+        split = len(history) - COMPACT_KEEP_MESSAGES
+        # Start the verbatim tail on a user turn so pairs stay together
+        while split > start and history[split]["role"] != "user":
+            split -= 1
+        if split - start < 2:
+            return None
+        return start, split
+
+    def _compact_history(self, max_input_tokens: int) -> None:
+        """Replace older conversation turns with a rolling summary.
+
+        Args:
+            max_input_tokens: Token budget for the conversation history
+        """
+        span = self._compaction_span(max_input_tokens)
+        if span is None:
+            return
+        start, split = span
+        summary = self._summarize(self.conversation_history[start:split])
+        self.conversation_history[start:split] = [
+            {"role": "system", "content": f"{SUMMARY_PREFIX}{summary}"}
+        ]
+        self._counted_history = None
+
+    async def _acompact_history(self, max_input_tokens: int) -> None:
+        """Replace older conversation turns with a rolling summary, async.
+
+        Args:
+            max_input_tokens: Token budget for the conversation history
+        """
+        span = self._compaction_span(max_input_tokens)
+        if span is None:
+            return
+        start, split = span
+        summary = await self._asummarize(self.conversation_history[start:split])
+        self.conversation_history[start:split] = [
+            {"role": "system", "content": f"{SUMMARY_PREFIX}{summary}"}
+        ]
+        self._counted_history = None
+
+    def _prepare_messages(self, messages: list[dict[str, Any]]) -> None:
+        """Compact conversation history in place before a model call."""
+        if messages is self.conversation_history:
+            self._compact_history(self._input_token_budget())
+
+    async def _aprepare_messages(self, messages: list[dict[str, Any]]) -> None:
+        """Compact conversation history in place before an async model call."""
+        if messages is self.conversation_history:
+            await self._acompact_history(self._input_token_budget())
+
+    def _response_cache_key(self, messages: list[dict[str, Any]]) -> str | None:
+        """Return the cache key for messages, or None when caching is off.
+
+        Responses are only cached for deterministic requests (temperature 0)
+        unless caching is forced with the ``cache`` config option.
+        """
+        if not (self.config.cache or self.config.temperature == 0):
+            return None
+        return _cache_key(
+            self.config.model,
+            messages,
+            self.config.temperature,
+            self.config.max_tokens,
+        )
+
+    def _semantic_key(self, messages: list[dict[str, Any]]) -> tuple[str, str] | None:
+        """Return the namespace and user prompt when the semantic cache applies.
+
+        The cache matches on prompt text, so it only serves stateless
+        single-turn requests: one user message after any system messages. In
+        a conversation, a short follow-up such as "yes" means something
+        different every time and must reach the model. The namespace covers
+        the model, sampling settings and system messages, so answers given
+        under other settings are not reused after a config change.
+        """
+        if self.semantic_cache is None or not messages:
+            return None
+        *prefix, last = messages
+        if any(m.get("role") != "system" for m in prefix):
+            return None
+        if last.get("role") != "user" or not isinstance(last.get("content"), str):
+            return None
+        namespace = _cache_key(
+            self.config.model,
+            prefix,
+            self.config.temperature,
+            self.config.max_tokens,
+        )
+        return namespace, str(last["content"])
+
+    def _lookup_cache(
+        self, messages: list[dict[str, Any]]
+    ) -> tuple[str | None, str | None]:
+        """Look up cached response for messages.
+
+        Returns:
+            Tuple of (exact-match cache key, cached response or None)
+        """
+        key = self._response_cache_key(messages)
+        if key is not None and key in self._response_cache:
+            self._response_cache.move_to_end(key)
+            return key, self._response_cache[key]
+        semantic_key = self._semantic_key(messages)
+        if semantic_key is not None and self.semantic_cache is not None:
+            namespace, prompt = semantic_key
+            return key, self.semantic_cache.lookup(prompt, namespace)
+        return key, None
+
+    def _store_cache(
+        self, key: str | None, messages: list[dict[str, Any]], content: str
+    ) -> None:
+        """Store response in the LRU cache and the semantic cache if enabled."""
+        if key is not None:
+            self._response_cache[key] = content
+            if len(self._response_cache) > RESPONSE_CACHE_SIZE:
+                self._response_cache.popitem(last=False)
+        semantic_key = self._semantic_key(messages)
+        if semantic_key is not None and self.semantic_cache is not None:
+            namespace, prompt = semantic_key
+            self.semantic_cache.add(prompt, content, namespace)
+
+    def _mark_cacheable(self, messages: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Add provider prompt-caching breakpoints for supported models.
+
+        Marks the first system message and the final message with
+        ``cache_control`` so the provider can reuse the already-processed
+        prefix on the next turn. History only grows between compactions, which
+        keeps that prefix byte-identical across turns until a summary
+        replaces older messages. Input messages are not mutated.
+        """
+        if not self.config.model.startswith(PROMPT_CACHE_MODEL_PREFIXES):
+            return messages
+        marked = list(messages)
+        system_index = next(
+            (i for i, m in enumerate(marked) if m.get("role") == "system"), None
+        )
+        for index in {system_index, len(marked) - 1}:
+            if index is None or index < 0:
+                continue
+            message = marked[index]
+            if isinstance(message.get("content"), str):
+                marked[index] = {
+                    **message,
+                    "content": [
+                        {
+                            "type": "text",
+                            "text": message["content"],
+                            "cache_control": {"type": "ephemeral"},
+                        }
+                    ],
+                }
+        return marked
+
     def chat_completion(self, messages: list[dict[str, Any]]) -> str:
         """Get chat completion from LiteLLM model."""
+        key, cached = self._lookup_cache(messages)
+        if cached is not None:
+            return cached
+        self._prepare_messages(messages)
+        try:
+            response = self._model_api().completion(
+                messages=self._mark_cacheable(messages),
+                **self._completion_kwargs,
+            )
+            content = response.choices[0].message.content or ""
+        except Exception as e:
+            raise ModelError(f"Model API call failed: {e}") from e
+        self._store_cache(key, messages, content)
+        return content
+
+    async def achat_completion(self, messages: list[dict[str, Any]]) -> str:
+        """Get chat completion from LiteLLM model without blocking the loop."""
+        key, cached = self._lookup_cache(messages)
+        if cached is not None:
+            return cached
+        await self._aprepare_messages(messages)
+        try:
+            response = await self._model_api(asynchronous=True).acompletion(
+                messages=self._mark_cacheable(messages),
+                **self._completion_kwargs,
+            )
+            content = response.choices[0].message.content or ""
+        except Exception as e:
+            raise ModelError(f"Model API call failed: {e}") from e
+        self._store_cache(key, messages, content)
+        return content
+
+    def stream_chat(self, messages: list[dict[str, Any]]) -> Iterator[str]:
+        """Stream chat completion tokens from LiteLLM model as they arrive."""
+        key, cached = self._lookup_cache(messages)
+        if cached is not None:
+            yield cached
+            return
+        self._prepare_messages(messages)
+        chunks: list[str] = []
         try:
-            response = litellm.completion(
-                model=self.config["model"],
-                messages=messages,
-                max_tokens=self.config["max_tokens"],
-                temperature=self.config["temperature"],
-                timeout=self.config["timeout"],
+            response = self._model_api().completion(
+                messages=self._mark_cacheable(messages),
+                **self._completion_kwargs,
+                stream=True,
             )
-            content = response.choices[0].message.content
-            return content if content is not None else ""
+            for chunk in response:
+                token = chunk.choices[0].delta.content
+                if token:
+                    chunks.append(token)
+                    yield token
         except Exception as e:
             raise ModelError(f"Model API call failed: {e}") from e
+        self._store_cache(key, messages, "".join(chunks))
 
     def process_single_prompt(self, prompt: str) -> str:
         """Process single prompt and return response."""
@@ -91,9 +585,134 @@ class Agent:
         self.add_message("assistant", response)
         return response
 
+    async def aprocess_single_prompt(self, prompt: str) -> str:
+        """Process single prompt asynchronously and return response."""
+        self.add_message("user", prompt)
+        response = await self.achat_completion(self.conversation_history)
+        self.add_message("assistant", response)
+        return response
+
+    def stream_single_prompt(self, prompt: str) -> Iterator[str]:
+        """Process single prompt, yielding response tokens as they arrive."""
+        self.add_message("user", prompt)
+        chunks: list[str] = []
+        for token in self.stream_chat(self.conversation_history):
+            chunks.append(token)
+            yield token
+        self.add_message("assistant", "".join(chunks))
+
+    async def aprocess_batch(
+        self, prompts: list[str], max_concurrency: int = 5
+    ) -> list[str]:
+        """Process independent prompts concurrently and return responses in order.
+
+        A prompt that fails yields an error entry in its position instead of
+        aborting the batch, so the other responses are still returned.
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def run_one(prompt: str) -> str:
+            async with semaphore:
+                return await self.achat_completion(
+                    [{"role": "user", "content": prompt}]
+                )
+
+        results = await asyncio.gather(
+            *(run_one(p) for p in prompts), return_exceptions=True
+        )
+        responses: list[str] = []
+        for result in results:
+            if isinstance(result, ModelError):
+                responses.append(f"Error: {result}")
+            elif isinstance(result, Exception):
+                responses.append(f"Unexpected error: {result}")
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                responses.append(result)
+        return responses
+
+    async def run_tool_calls(self, calls: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Execute bash tool calls, running independent calls concurrently.
+
+        Each call is a dict with a ``command`` and optionally an ``id`` and a
+        ``depends_on`` list of ids of earlier calls whose results it needs.
+        Calls are grouped into dependency levels; each level runs in worker
+        threads under one ``asyncio.gather`` once the previous level has
+        finished. Calls run one at a time when confirmation prompts or the
+        persistent shell are enabled, since neither can be shared.
+
+        Args:
+            calls: Tool calls in the order the model emitted them
+
+        Returns:
+            Execution result for each call, in input order
+
+        Raises:
+            AgentError: If a call depends on an unknown or later call
+        """
+        positions = {call.get("id", index): index for index, call in enumerate(calls)}
+        levels: list[int] = []
+        for index, call in enumerate(calls):
+            level = 0
+            for dependency in call.get("depends_on", []):
+                position = positions.get(dependency)
+                if position is None or position >= index:
+                    raise AgentError(
+                        f"Tool call {call.get('id', index)} has invalid "
+                        f"dependency: {dependency}"
+                    )
+                level = max(level, levels[position] + 1)
+            levels.append(level)
+
+        results: list[dict[str, Any]] = [{} for _ in calls]
+        sequential = (
+            self.bash_tool.confirmation_required or self.bash_tool.persistent_shell
+        )
+        for level in range(max(levels, default=-1) + 1):
+            batch = [i for i, call_level in enumerate(levels) if call_level == level]
+            if sequential:
+                for i in batch:
+                    results[i] = self.bash_tool.execute_command(calls[i]["command"])
+                continue
+            outputs = await asyncio.gather(
+                *(
+                    asyncio.to_thread(
+                        self.bash_tool.execute_command, calls[i]["command"]
+                    )
+                    for i in batch
+                )
+            )
+            for i, output in zip(batch, outputs, strict=True):
+                results[i] = output
+        return results
+
+    def _stream_to_stdout(self) -> str:
+        """Stream a response for the conversation to stdout and return it.
+
+        Ctrl+C while tokens are arriving stops the response early and keeps
+        the partial text instead of ending the session.
+        """
+        out = sys.stdout
+        chunks: list[str] = []
+        try:
+            write_stream(
+                self.stream_chat(self.conversation_history),
+                out,
+                chunks,
+                prefix=STREAM_PREFIX,
+            )
+        except KeyboardInterrupt:
+            if not chunks:
+                out.write(STREAM_PREFIX)
+            out.write(" [interrupted]")
+        out.write("\n\n")
+        out.flush()
+        return "".join(chunks)
+
     def interactive_loop(self) -> None:
         """Run interactive conversation loop."""
-        verbose = self.config.get("verbose", False)
+        verbose = self.config.verbose
 
         # Start new session if not resuming
         if not self.current_session:
@@ -101,7 +720,7 @@ class Agent:
             if verbose and self.current_session:
                 print(f"Started session: {self.current_session.session_id}")
 
-        if not self.config.get("quiet", False):
+        if not self.config.quiet:
             print("AI Coding Agent (type 'exit' to quit)")
             if self.current_session:
                 print(f"Session: {self.current_session.session_id}\n")
@@ -110,9 +729,9 @@ class Agent:
             try:
                 user_input = input("User: ").strip()
 
-                if user_input.lower() in ("exit", "quit", "bye"):
+                if user_input.casefold() in _EXIT_WORDS:
                     self.save_current_session()
-                    if not self.config.get("quiet", False):
+                    if not self.config.quiet:
                         print(
                             f"Session saved: {self.current_session.session_id if self.current_session else 'none'}"
                         )
@@ -126,14 +745,13 @@ class Agent:
                 if verbose:
                     print("Agent: Thinking...")
 
-                response = self.chat_completion(self.conversation_history)
+                if self.config.stream:
+                    response = self._stream_to_stdout()
+                else:
+                    response = self.chat_completion(self.conversation_history)
+                    print(f"Agent: {response}\n")
                 self.add_message("assistant", response)
 
-                print(f"Agent: {response}\n")
-
-                # Save session after each interaction
-                self.save_current_session()
-
             except KeyboardInterrupt:
                 print("\nSaving session...")
                 self.save_current_session()
@@ -141,7 +759,9 @@ class Agent:
                 break
             except ModelError as e:
                 print(f"Error: {e}")
+                self.save_current_session()
             except Exception as e:
                 print(f"Unexpected error: {e}")
+                self.save_current_session()
                 if verbose:
                     print("Use --verbose for more details")
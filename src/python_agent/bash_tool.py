@@ -3,11 +3,29 @@
 Keywords: bash, tool, subprocess, command, execution, shell
 
 This module provides the single bash tool for executing shell commands
-with confirmation prompts and timeout handling as required.
+with confirmation prompts and timeout handling as required. Command output
+is streamed from the pipes and only a bounded tail is kept in memory.
+Optionally, commands run in one long-lived bash process so shell startup is
+paid once and working directory and environment persist between calls.
 """
 
+import contextlib
+import os
+import selectors
+import shlex
+import signal
 import subprocess
-from typing import Any
+import threading
+import time
+import uuid
+from collections import deque
+from typing import IO, Any
+
+READ_CHUNK_SIZE = 64 * 1024
+MAX_OUTPUT_BYTES = 1024 * 1024
+# How long to wait for the output pipes to close after a timeout kill
+DRAIN_GRACE_SECONDS = 1.0
+_YES = frozenset({"y", "yes"})
 
 
 class BashToolError(Exception):
@@ -17,6 +35,42 @@ class BashToolError(Exception):
     """
 
 
+class _TailBuffer:
+    """Byte buffer that keeps only the last max_bytes written to it."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self.truncated = False
+        self._chunks: deque[bytes] = deque()
+        self._size = 0
+
+    def write(self, chunk: bytes) -> None:
+        """Append chunk, dropping the oldest bytes beyond max_bytes."""
+        self._chunks.append(chunk)
+        self._size += len(chunk)
+        while self._size > self.max_bytes:
+            excess = self._size - self.max_bytes
+            oldest = self._chunks[0]
+            if len(oldest) <= excess:
+                self._chunks.popleft()
+                self._size -= len(oldest)
+            else:
+                self._chunks[0] = oldest[excess:]
+                self._size -= excess
+            self.truncated = True
+
+    def getvalue(self) -> bytes:
+        """Return buffered bytes."""
+        return b"".join(self._chunks)
+
+
+def _drain(stream: IO[bytes], buffer: _TailBuffer) -> None:
+    """Read stream to EOF in chunks into buffer."""
+    with stream:
+        while chunk := stream.read1(READ_CHUNK_SIZE):  # type: ignore[attr-defined]
+            buffer.write(chunk)
+
+
 class BashTool:
     """Bash command execution tool with confirmation and timeout support.
 
@@ -26,16 +80,25 @@ class BashTool:
     prompts and configurable timeout handling.
     """
 
-    def __init__(self, confirmation_required: bool = False, timeout: int = 30) -> None:
+    def __init__(
+        self,
+        confirmation_required: bool = False,
+        timeout: int = 30,
+        persistent_shell: bool = False,
+    ) -> None:
         """Initialize bash tool with configuration options.
 
         Args:
             confirmation_required: Whether to prompt for confirmation before execution
             timeout: Command timeout in seconds (default: 30)
+            persistent_shell: Whether to run commands in one long-lived bash
+                process instead of a fresh process per command
         """
         self.confirmation_required = confirmation_required
         self.timeout = timeout
+        self.persistent_shell = persistent_shell
         self.enabled = True
+        self._shell: subprocess.Popen[bytes] | None = None
 
     def set_enabled(self, enabled: bool) -> None:
         """Enable or disable the bash tool.
@@ -59,8 +122,8 @@ class BashTool:
             True if user confirms, False otherwise
         """
         print(f"Execute command: {command}")
-        response = input("Continue? [y/N]: ").strip().lower()
-        return response in ("y", "yes")
+        response = input("Continue? [y/N]: ").strip().casefold()
+        return response in _YES
 
     def execute_command(self, command: str) -> dict[str, Any]:
         """Execute a bash command with timeout and error handling.
@@ -76,6 +139,8 @@ class BashTool:
             - output: str containing stdout output
             - error: str containing stderr output
             - exit_code: int command exit code
+            - truncated: bool indicating if output was cut to its last
+              MAX_OUTPUT_BYTES bytes
 
         Raises:
             BashToolError: If tool is disabled or other execution errors occur
@@ -89,22 +154,18 @@ class BashTool:
                 "output": "",
                 "error": "Command execution cancelled by user",
                 "exit_code": 1,
+                "truncated": False,
             }
 
         try:
-            result = subprocess.run(
-                command,
-                shell=True,
-                capture_output=True,
-                text=True,
-                timeout=self.timeout,
-            )
-
+            run = self._run_in_shell if self.persistent_shell else self._run
+            exit_code, stdout, stderr = run(command)
             return {
-                "success": result.returncode == 0,
-                "output": result.stdout,
-                "error": result.stderr,
-                "exit_code": result.returncode,
+                "success": exit_code == 0,
+                "output": stdout.getvalue().decode("utf-8", errors="replace"),
+                "error": stderr.getvalue().decode("utf-8", errors="replace"),
+                "exit_code": exit_code,
+                "truncated": stdout.truncated or stderr.truncated,
             }
 
         except subprocess.TimeoutExpired:
@@ -113,6 +174,7 @@ class BashTool:
                 "output": "",
                 "error": f"Command timed out after {self.timeout} seconds",
                 "exit_code": 124,
+                "truncated": False,
             }
         except Exception as e:
             return {
@@ -120,4 +182,153 @@ class BashTool:
                 "output": "",
                 "error": f"Execution error: {str(e)}",
                 "exit_code": 1,
+                "truncated": False,
             }
+
+    def _run(self, command: str) -> tuple[int, _TailBuffer, _TailBuffer]:
+        """Run command, streaming stdout and stderr into bounded buffers.
+
+        Args:
+            command: The bash command to execute
+
+        Returns:
+            Tuple of (exit code, stdout buffer, stderr buffer)
+
+        Raises:
+            subprocess.TimeoutExpired: If the command, or a background child
+                still holding its output pipes, exceeds the timeout; the whole
+                process group is killed first
+        """
+        deadline = time.monotonic() + self.timeout
+        proc = subprocess.Popen(
+            ["bash", "-c", command],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=READ_CHUNK_SIZE,
+            start_new_session=True,
+        )
+        stdout = _TailBuffer(MAX_OUTPUT_BYTES)
+        stderr = _TailBuffer(MAX_OUTPUT_BYTES)
+        readers = [
+            threading.Thread(target=_drain, args=(pipe, buffer), daemon=True)
+            for pipe, buffer in ((proc.stdout, stdout), (proc.stderr, stderr))
+        ]
+        for reader in readers:
+            reader.start()
+        try:
+            exit_code = proc.wait(timeout=self.timeout)
+            # Background children inherit the pipes, so EOF can come later
+            for reader in readers:
+                reader.join(max(0.0, deadline - time.monotonic()))
+            if not any(reader.is_alive() for reader in readers):
+                return exit_code, stdout, stderr
+            timeout = subprocess.TimeoutExpired(proc.args, self.timeout)
+        except subprocess.TimeoutExpired as e:
+            timeout = e
+        with contextlib.suppress(ProcessLookupError):
+            os.killpg(proc.pid, signal.SIGKILL)
+        proc.wait()
+        for reader in readers:
+            reader.join(DRAIN_GRACE_SECONDS)
+        raise timeout
+
+    def _start_shell(self) -> subprocess.Popen[bytes]:
+        """Return the long-lived bash process, starting it if needed."""
+        if self._shell is None or self._shell.poll() is not None:
+            self._shell = subprocess.Popen(
+                ["bash"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                start_new_session=True,
+            )
+        return self._shell
+
+    def _run_in_shell(self, command: str) -> tuple[int, _TailBuffer, _TailBuffer]:
+        """Run command in the long-lived bash process.
+
+        The command is eval'd with stdin from /dev/null so it cannot consume
+        later input, then a per-call marker followed by the exit status is
+        printed on stdout and the marker alone on stderr. Output is read until
+        both markers arrive. If the command exits the shell, the exit code is
+        taken from the process and a new shell is started on the next call.
+
+        Args:
+            command: The bash command to execute
+
+        Returns:
+            Tuple of (exit code, stdout buffer, stderr buffer)
+
+        Raises:
+            subprocess.TimeoutExpired: If both markers do not arrive within
+                the timeout; the shell's process group is killed first
+        """
+        shell = self._start_shell()
+        assert shell.stdin and shell.stdout and shell.stderr
+        marker = f"__AGENT_DONE_{uuid.uuid4().hex}__".encode()
+        script = (
+            f"eval {shlex.quote(command)} < /dev/null\n"
+            f"printf '%s%d\\n' {marker.decode()} $?\n"
+            f"printf '%s\\n' {marker.decode()} >&2\n"
+        )
+        stdout = _TailBuffer(MAX_OUTPUT_BYTES)
+        stderr = _TailBuffer(MAX_OUTPUT_BYTES)
+        stdout_fd = shell.stdout.fileno()
+        buffers = {stdout_fd: stdout, shell.stderr.fileno(): stderr}
+        pending = dict.fromkeys(buffers, b"")
+        exit_code: int | None = None
+        deadline = time.monotonic() + self.timeout
+
+        try:
+            shell.stdin.write(script.encode())
+            shell.stdin.flush()
+        except BrokenPipeError:
+            self.close()
+            raise
+
+        with selectors.DefaultSelector() as selector:
+            for fd in buffers:
+                selector.register(fd, selectors.EVENT_READ)
+            while selector.get_map():
+                events = selector.select(timeout=max(deadline - time.monotonic(), 0))
+                if not events:
+                    self.close()
+                    raise subprocess.TimeoutExpired(command, self.timeout)
+                for key, _ in events:
+                    fd = key.fd
+                    chunk = os.read(fd, READ_CHUNK_SIZE)
+                    data = pending[fd] + chunk
+                    index = data.find(marker)
+                    if not chunk or (index >= 0 and data.endswith(b"\n")):
+                        selector.unregister(fd)
+                        if index < 0:
+                            index = len(data)
+                        elif fd == stdout_fd:
+                            exit_code = int(data[index + len(marker) :])
+                        buffers[fd].write(data[:index])
+                        continue
+                    # Hold back enough bytes to match a marker split by reads
+                    keep = len(data) - index if index >= 0 else len(marker)
+                    buffers[fd].write(data[:-keep])
+                    pending[fd] = data[-keep:]
+
+        if exit_code is None:
+            exit_code = shell.wait()
+            self.close()
+        return exit_code, stdout, stderr
+
+    def close(self) -> None:
+        """Terminate the long-lived bash process, if one is running.
+
+        Keywords: close, shutdown, shell, cleanup
+        """
+        shell, self._shell = self._shell, None
+        if shell is None:
+            return
+        if shell.poll() is None:
+            with contextlib.suppress(ProcessLookupError):
+                os.killpg(shell.pid, signal.SIGKILL)
+            shell.wait()
+        for pipe in (shell.stdin, shell.stdout, shell.stderr):
+            if pipe is not None:
+                pipe.close()
@@ -6,18 +6,50 @@ Implements:
 - Interactive mode (default)
 - Single-shot mode (--prompt)
 - File input mode (--file)
+- Batch mode (--file with --batch)
 - Session resume (--resume)
 - Tool flags (--allow-tools/--no-tools)
 - Confirmation flags (--confirm/--no-confirm)
 """
 
+import asyncio
 import sys
+from collections.abc import Coroutine
 from pathlib import Path
+from typing import Any, TypeVar
 
 import click
 
 from python_agent.config import ConfigurationError, load_configuration
 
+T = TypeVar("T")
+
+
+def _run_async(agent: Any, coroutine: Coroutine[Any, Any, T]) -> T:
+    """Run coroutine, closing the agent's async HTTP client in the same loop."""
+
+    async def run() -> T:
+        try:
+            return await coroutine
+        finally:
+            await agent.aclose()
+
+    return asyncio.run(run())
+
+
+def _run_single_prompt(agent: Any, prompt: str, stream: bool) -> None:
+    """Run one prompt through the agent and echo the response."""
+    if stream:
+        from python_agent.agent import STREAM_PREFIX, write_stream
+
+        write_stream(
+            agent.stream_single_prompt(prompt), sys.stdout, [], prefix=STREAM_PREFIX
+        )
+        click.echo()
+    else:
+        response = _run_async(agent, agent.aprocess_single_prompt(prompt))
+        click.echo(f"Agent: {response}")
+
 
 @click.command()
 @click.option("--prompt", "-p", help="Single-shot mode: execute prompt and exit")
@@ -28,6 +60,18 @@ from python_agent.config import ConfigurationError, load_configuration
     type=click.Path(exists=True, path_type=Path),
     help="File input mode: load prompt from file",
 )
+@click.option(
+    "--batch",
+    is_flag=True,
+    help="With --file: run each non-empty line as an independent prompt",
+)
+@click.option(
+    "--max-concurrency",
+    type=click.IntRange(min=1),
+    default=5,
+    show_default=True,
+    help="Maximum concurrent model requests in batch mode",
+)
 @click.option("--resume", "-r", "session_id", help="Resume session by ID")
 @click.option(
     "--config", "-c", type=click.Path(path_type=Path), help="Configuration file path"
@@ -42,15 +86,29 @@ from python_agent.config import ConfigurationError, load_configuration
     default=None,
     help="Enable or disable confirmation prompts (overrides config)",
 )
+@click.option(
+    "--stream/--no-stream",
+    default=None,
+    help="Enable or disable streaming response output (overrides config)",
+)
+@click.option(
+    "--cache/--no-cache",
+    default=None,
+    help="Enable or disable exact-match response caching (overrides config)",
+)
 @click.option("--verbose", "-v", is_flag=True, help="Enable verbose output")
 @click.option("--quiet", "-q", is_flag=True, help="Enable quiet mode (errors only)")
 def main(
     prompt: str | None,
     input_file: Path | None,
+    batch: bool,
+    max_concurrency: int,
     session_id: str | None,
     config: Path | None,
     allow_tools: bool | None,
     confirm: bool | None,
+    stream: bool | None,
+    cache: bool | None,
     verbose: bool,
     quiet: bool,
 ) -> int:
@@ -63,7 +121,8 @@ def main(
         agent                           # Interactive mode
         agent --prompt "List files"     # Single-shot mode
         agent --file prompt.txt         # File input mode
-        agent --resume 2024-01-01-12-00 # Resume session
+        agent --file prompts.txt --batch  # One prompt per line, run concurrently
+        agent --resume 2024-01-01-12-00-00-000000000  # Resume session
     """
     try:
         # Load configuration
@@ -74,6 +133,10 @@ def main(
             agent_config["tools_enabled"] = allow_tools
         if confirm is not None:
             agent_config["confirmation_required"] = confirm
+        if stream is not None:
+            agent_config["stream"] = stream
+        if cache is not None:
+            agent_config["cache"] = cache
 
         # Set verbosity
         agent_config["verbose"] = verbose
@@ -87,6 +150,9 @@ def main(
                 "Error: Cannot use --prompt, --file, and --resume together", err=True
             )
             return 2
+        if batch and input_file is None:
+            click.echo("Error: --batch requires --file", err=True)
+            return 2
 
         # Import agent after successful configuration loading
         from python_agent.agent import Agent, AgentError
@@ -104,8 +170,7 @@ def main(
                 # Single-shot mode
                 if verbose:
                     click.echo("Running single-shot mode")
-                response = agent.process_single_prompt(prompt)
-                click.echo(f"Agent: {response}")
+                _run_single_prompt(agent, prompt, agent_config.get("stream", False))
             elif input_file:
                 # File input mode
                 if verbose:
@@ -115,8 +180,21 @@ def main(
                 except (FileNotFoundError, PermissionError, UnicodeDecodeError) as e:
                     click.echo(f"Error reading file {input_file}: {e}", err=True)
                     return 1
-                response = agent.process_single_prompt(file_content)
-                click.echo(f"Agent: {response}")
+                if batch:
+                    prompts = [
+                        line.strip()
+                        for line in file_content.splitlines()
+                        if line.strip()
+                    ]
+                    responses = _run_async(
+                        agent, agent.aprocess_batch(prompts, max_concurrency)
+                    )
+                    for response in responses:
+                        click.echo(f"Agent: {response}")
+                else:
+                    _run_single_prompt(
+                        agent, file_content, agent_config.get("stream", False)
+                    )
             elif session_id:
                 # Session resume mode
                 if verbose:
@@ -151,6 +229,8 @@ def main(
 
                 click.echo(traceback.format_exc(), err=True)
             return 1
+        finally:
+            agent.close()
 
         return 0
 
@@ -6,12 +6,14 @@ variable overrides and basic validation for the minimal AI coding agent.
 Keywords: configuration, YAML, config, settings, environment, variables
 """
 
+import functools
 import os
+from collections.abc import Callable, Mapping
+from dataclasses import asdict, dataclass, fields
 from pathlib import Path
+from types import MappingProxyType
 from typing import Any
 
-import yaml
-
 
 class ConfigurationError(Exception):
     """Raised when configuration is invalid.
@@ -22,6 +24,33 @@ class ConfigurationError(Exception):
     pass
 
 
+_TRUE_VALUES = frozenset({"true", "1", "yes"})
+
+# Options older config files may still carry; accepted and ignored
+LEGACY_CONFIG_KEYS = frozenset({"confirm_commands"})
+
+
+def _to_bool(value: str) -> bool:
+    """Convert environment variable string to boolean."""
+    return value.casefold() in _TRUE_VALUES
+
+
+# Environment variable -> (config key, converter)
+_ENV_SPEC: Mapping[str, tuple[str, Callable[[str], Any]]] = MappingProxyType(
+    {
+        "API_KEY": ("api_key", str),
+        "MODEL": ("model", str),
+        "BASE_URL": ("base_url", str),
+        "TIMEOUT": ("timeout", int),
+        "MAX_TOKENS": ("max_tokens", int),
+        "TEMPERATURE": ("temperature", float),
+        "TOOLS_ENABLED": ("tools_enabled", _to_bool),
+        "CONFIRMATION_REQUIRED": ("confirmation_required", _to_bool),
+        "SESSION_DIR": ("session_dir", str),
+    }
+)
+
+
 def get_default_config() -> dict[str, Any]:
     """Get default configuration values.
 
@@ -39,15 +68,88 @@ def get_default_config() -> dict[str, Any]:
         "temperature": 0.7,
         "tools_enabled": True,
         "confirmation_required": False,
+        "persistent_shell": False,
+        "stream": True,
+        "max_input_tokens": None,
+        "summary_model": None,
+        "cache": False,
+        "semantic_cache": False,
+        "semantic_cache_threshold": 0.92,
         "session_dir": str(Path.home() / ".agent" / "sessions"),
     }
 
 
+@dataclass(frozen=True, slots=True)
+class AgentConfig:
+    """Immutable agent settings with attribute access.
+
+    Keywords: configuration, settings, dataclass, immutable, agent
+
+    Built from the merged configuration dictionary where the agent is
+    created. Attribute reads avoid per-call dict lookups on the hot path.
+    ``from_dict`` rejects unknown keys so typos fail early; options left in
+    older config files (LEGACY_CONFIG_KEYS) are accepted and ignored.
+    """
+
+    model: str
+    api_key: str | None
+    base_url: str | None
+    timeout: int
+    max_tokens: int
+    temperature: float
+    tools_enabled: bool
+    confirmation_required: bool
+    persistent_shell: bool
+    stream: bool
+    max_input_tokens: int | None
+    summary_model: str | None
+    cache: bool
+    semantic_cache: bool
+    semantic_cache_threshold: float
+    session_dir: str
+    verbose: bool = False
+    quiet: bool = False
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "AgentConfig":
+        """Create config from a dictionary, filling missing keys with defaults.
+
+        Args:
+            data: Configuration dictionary
+
+        Returns:
+            AgentConfig instance
+
+        Raises:
+            ConfigurationError: If data has keys that are neither options nor
+                legacy options
+        """
+        names = {f.name for f in fields(cls)}
+        unknown = sorted(data.keys() - names - LEGACY_CONFIG_KEYS)
+        if unknown:
+            raise ConfigurationError(
+                f"Unknown configuration option: {', '.join(unknown)}"
+            )
+        known = {key: value for key, value in data.items() if key in names}
+        return cls(**{**get_default_config(), **known})
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Return option value by name, or default for unknown names."""
+        return getattr(self, key, default)
+
+    def to_dict(self) -> dict[str, Any]:
+        """Convert config to a plain dictionary."""
+        return asdict(self)
+
+
 def load_config_file(config_path: Path | None = None) -> dict[str, Any]:
     """Load configuration from YAML file.
 
     Keywords: load, configuration, YAML, file, settings
 
+    Parsed results are memoized by path, modification time and size, so
+    repeated loads of an unchanged file do no parsing work.
+
     Args:
         config_path: Path to YAML config file. If None, uses default location.
 
@@ -60,12 +162,31 @@ def load_config_file(config_path: Path | None = None) -> dict[str, Any]:
     if config_path is None:
         config_path = Path.home() / ".agent" / "config.yaml"
 
-    if not config_path.exists():
+    try:
+        stat = config_path.stat()
+    except FileNotFoundError:
         return {}
+    except OSError as e:
+        raise ConfigurationError(f"Cannot read config file: {e}") from e
+
+    return dict(
+        _load_config_file_cached(str(config_path), stat.st_mtime_ns, stat.st_size)
+    )
 
+
+@functools.lru_cache(maxsize=8)
+def _load_config_file_cached(path: str, mtime_ns: int, size: int) -> dict[str, Any]:
+    """Parse YAML config file, using the libyaml C loader when available.
+
+    mtime_ns and size are only part of the cache key, so an edited file is
+    parsed again.
+    """
+    import yaml
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
     try:
-        with open(config_path) as f:
-            data = yaml.safe_load(f)
+        with open(path) as f:
+            data = yaml.load(f, Loader=loader)
             return data if data is not None else {}
     except yaml.YAMLError as e:
         raise ConfigurationError(f"Invalid YAML in config file: {e}") from e
@@ -81,30 +202,9 @@ def apply_env_overrides(config: dict[str, Any]) -> None:
     Args:
         config: Configuration dictionary to modify in-place
     """
-    env_mappings = {
-        "API_KEY": "api_key",
-        "MODEL": "model",
-        "BASE_URL": "base_url",
-        "TIMEOUT": "timeout",
-        "MAX_TOKENS": "max_tokens",
-        "TEMPERATURE": "temperature",
-        "TOOLS_ENABLED": "tools_enabled",
-        "CONFIRMATION_REQUIRED": "confirmation_required",
-        "SESSION_DIR": "session_dir",
-    }
-
-    for env_var, config_key in env_mappings.items():
-        value = os.getenv(env_var)
-        if value is not None:
-            # Convert string values to appropriate types
-            if config_key in ["timeout", "max_tokens"]:
-                config[config_key] = int(value)
-            elif config_key == "temperature":
-                config[config_key] = float(value)
-            elif config_key in ["tools_enabled", "confirmation_required"]:
-                config[config_key] = value.lower() in ("true", "1", "yes")
-            else:
-                config[config_key] = value
+    for env_var in _ENV_SPEC.keys() & os.environ.keys():
+        config_key, convert = _ENV_SPEC[env_var]
+        config[config_key] = convert(os.environ[env_var])
 
 
 def validate_config(config: dict[str, Any]) -> None:
@@ -0,0 +1,192 @@
+"""Semantic response cache for near-duplicate prompts.
+
+Keywords: cache, semantic, embedding, similarity, prompt, response
+
+This module provides an optional cache that returns a stored response when a
+new prompt is semantically close to a previously answered one. Prompts are
+embedded with sentence-transformers (optional dependency) and compared by
+cosine similarity against a bounded in-memory index that is persisted as an
+append-only JSONL file. Entries carry a namespace, so callers can keep answers
+produced under different settings apart.
+"""
+
+import json
+import math
+import operator
+from collections.abc import Callable, Sequence
+from pathlib import Path
+from typing import Any
+
+Encoder = Callable[[str], Sequence[float]]
+
+DEFAULT_MODEL_NAME = "all-MiniLM-L6-v2"
+
+
+class SemanticCacheError(Exception):
+    """Raised when the semantic cache cannot be used.
+
+    Keywords: error, exception, semantic, cache
+    """
+
+
+def _normalize(vector: Sequence[float]) -> list[float]:
+    """Scale vector to unit length so dot product equals cosine similarity."""
+    norm = math.sqrt(sum(x * x for x in vector))
+    if norm == 0:
+        return [0.0 for _ in vector]
+    return [x / norm for x in vector]
+
+
+def _load_default_encoder(model_name: str) -> Encoder:
+    """Create a lazily-initialized sentence-transformers encoder.
+
+    Raises:
+        SemanticCacheError: If sentence-transformers is not installed
+    """
+    try:
+        from sentence_transformers import SentenceTransformer
+    except ImportError as e:
+        raise SemanticCacheError(
+            "Semantic cache requires sentence-transformers "
+            "(pip install sentence-transformers)"
+        ) from e
+
+    model: Any = None
+
+    def encode(text: str) -> Sequence[float]:
+        nonlocal model
+        if model is None:
+            model = SentenceTransformer(model_name)
+        return list(model.encode(text).tolist())
+
+    return encode
+
+
+class SemanticCache:
+    """Bounded nearest-neighbour cache of prompt embeddings and responses.
+
+    Keywords: semantic, cache, embedding, cosine, similarity
+
+    Lookups embed the prompt and scan the index with an inner product over
+    unit vectors; a hit is returned when the best similarity among entries
+    in the same namespace reaches the configured threshold. The oldest
+    entries are dropped beyond max_entries.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.92,
+        path: Path | None = None,
+        encoder: Encoder | None = None,
+        max_entries: int = 512,
+    ) -> None:
+        """Initialize semantic cache.
+
+        Args:
+            threshold: Minimum cosine similarity for a cache hit
+            path: Optional JSONL file used to persist entries
+            encoder: Function mapping text to an embedding vector
+                (default: sentence-transformers all-MiniLM-L6-v2)
+            max_entries: Maximum number of entries kept in memory
+        """
+        self.threshold = threshold
+        self.path = path
+        self.max_entries = max_entries
+        self._encode = encoder or _load_default_encoder(DEFAULT_MODEL_NAME)
+        self._vectors: list[list[float]] = []
+        self._responses: list[str] = []
+        self._namespaces: list[str] = []
+        if path is not None and path.exists():
+            self._load(path)
+
+    def _load(self, path: Path) -> None:
+        """Load persisted entries, keeping only the newest max_entries.
+
+        The file is rewritten with the kept entries once it holds more than
+        twice max_entries, so it does not grow without bound.
+        """
+        try:
+            total = 0
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._append(
+                            entry["vector"],
+                            entry["response"],
+                            entry.get("namespace", ""),
+                        )
+                        total += 1
+            if total > 2 * self.max_entries:
+                with open(path, "w", encoding="utf-8") as f:
+                    for index in range(len(self._vectors)):
+                        f.write(json.dumps(self._entry(index)))
+                        f.write("\n")
+        except (OSError, ValueError, KeyError) as e:
+            raise SemanticCacheError(f"Failed to load semantic cache: {e}") from e
+
+    def _append(self, vector: list[float], response: str, namespace: str) -> None:
+        """Add entry to the in-memory index, evicting the oldest if full."""
+        self._vectors.append(vector)
+        self._responses.append(response)
+        self._namespaces.append(namespace)
+        if len(self._vectors) > self.max_entries:
+            del self._vectors[0]
+            del self._responses[0]
+            del self._namespaces[0]
+
+    def _entry(self, index: int) -> dict[str, Any]:
+        """Return the persisted form of the entry at index."""
+        return {
+            "namespace": self._namespaces[index],
+            "vector": self._vectors[index],
+            "response": self._responses[index],
+        }
+
+    def __len__(self) -> int:
+        """Return number of cached entries."""
+        return len(self._vectors)
+
+    def lookup(self, prompt: str, namespace: str = "") -> str | None:
+        """Return cached response for a semantically similar prompt.
+
+        Args:
+            prompt: User prompt text
+            namespace: Only entries added under this namespace can match
+
+        Returns:
+            Cached response, or None if no entry meets the threshold
+        """
+        if namespace not in self._namespaces:
+            return None
+        query = _normalize(self._encode(prompt))
+        best_score = -1.0
+        best_index = -1
+        for index, vector in enumerate(self._vectors):
+            if self._namespaces[index] != namespace:
+                continue
+            score = sum(map(operator.mul, query, vector))
+            if score > best_score:
+                best_score, best_index = score, index
+        if best_score >= self.threshold:
+            return self._responses[best_index]
+        return None
+
+    def add(self, prompt: str, response: str, namespace: str = "") -> None:
+        """Embed prompt and store response in the cache.
+
+        Args:
+            prompt: User prompt text
+            response: Model response to cache
+            namespace: Namespace that later lookups must match
+        """
+        vector = _normalize(self._encode(prompt))
+        self._append(vector, response, namespace)
+        if self.path is not None:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps(self._entry(len(self._vectors) - 1)))
+                    f.write("\n")
+            except OSError as e:
+                raise SemanticCacheError(f"Failed to save semantic cache: {e}") from e
@@ -1,12 +1,16 @@
 """File-based session management for conversation persistence.
 
 This module provides session management functionality for saving and resuming
-conversation history. Sessions are stored as JSON files with timestamp-based IDs.
+conversation history. Sessions have timestamp-based IDs and are stored as an
+append-only, gzip-compressed JSONL log of messages, so each save writes only the
+messages added since the previous one, plus a small JSON sidecar with session
+metadata. The log is periodically rewritten whole so it stays well compressed.
 
 Keywords: session, persistence, file-based, conversation, history, JSON
 
 Main classes:
     - SessionManager: Primary interface for session operations
+    - AsyncSessionManager: Non-blocking wrapper for use inside event loops
     - Session: Individual session data container
 
 Basic usage:
@@ -17,13 +21,150 @@ Basic usage:
     loaded = manager.load_session(session.session_id)
 """
 
+import asyncio
+import gzip
 import json
+import os
+import queue
+import threading
+import time
+import zlib
+from collections.abc import Iterable, Iterator
 from datetime import datetime
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO
 
 from python_agent.config import load_configuration
 
+try:
+    import orjson
+
+    HAS_ORJSON = True
+except ImportError:
+    HAS_ORJSON = False
+
+SAVE_DEBOUNCE_SECONDS = 0.2
+LOG_SUFFIX = ".jsonl.gz"
+META_SUFFIX = ".meta.json"
+LEGACY_SUFFIX = ".json"
+LOG_MEMBER_SIZE = 64 * 1024
+LOG_COMPACT_APPENDS = 16
+LOAD_CHUNK_SIZE = 64 * 1024
+
+_id_lock = threading.Lock()
+_last_id_ns = 0
+
+
+def _dumps(data: Any, indent: bool = False) -> bytes:
+    """Serialize data to UTF-8 JSON, using orjson when it is installed.
+
+    Args:
+        data: JSON-serializable data
+        indent: Pretty-print with two-space indentation
+
+    Returns:
+        Encoded JSON bytes
+    """
+    if HAS_ORJSON:
+        # Annotated rather than cast: orjson is typed when installed, and the
+        # cast would then be redundant
+        encoded: bytes = orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+        return encoded
+    return json.dumps(data, indent=2 if indent else None, ensure_ascii=False).encode(
+        "utf-8"
+    )
+
+
+def _loads(data: bytes) -> Any:
+    """Deserialize JSON bytes, using orjson when it is installed.
+
+    Raises:
+        json.JSONDecodeError: If data is not valid JSON (orjson's decode
+            error is a subclass)
+    """
+    if HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def _dump_lines(messages: list[dict[str, Any]], start: int) -> bytes:
+    """Encode messages as gzip members of indexed JSONL records.
+
+    Concatenated gzip members form a valid gzip stream, so the result can be
+    appended to an existing log. Level 1 keeps compression close to memcpy
+    speed while still shrinking the repetitive JSON several times over.
+    A new member starts every LOG_MEMBER_SIZE bytes of JSON so readers can
+    verify and release the log piece by piece; deflate's window is only
+    32 KiB, so the split costs next to nothing in compression ratio.
+    """
+    members = []
+    lines: list[bytes] = []
+    size = 0
+    for index, message in enumerate(messages, start):
+        line = _dumps({"index": index, **message}) + b"\n"
+        lines.append(line)
+        size += len(line)
+        if size >= LOG_MEMBER_SIZE:
+            members.append(gzip.compress(b"".join(lines), compresslevel=1, mtime=0))
+            lines, size = [], 0
+    if lines or not members:
+        members.append(gzip.compress(b"".join(lines), compresslevel=1, mtime=0))
+    return b"".join(members)
+
+
+def _iter_log_lines(f: BinaryIO) -> Iterator[bytes | None]:
+    """Stream JSONL lines out of concatenated gzip members.
+
+    The log is read and decompressed in LOAD_CHUNK_SIZE pieces, and the lines
+    of each member are released once its checksum has been verified, so
+    memory use is bounded by the member size rather than the whole log.
+
+    Yields:
+        Each non-empty line, then None if the last member was truncated
+
+    Raises:
+        zlib.error: If a member is corrupt
+    """
+    member = zlib.decompressobj(wbits=31)
+    in_member = False
+    pending = b""
+    lines: list[bytes] = []
+    while chunk := f.read(LOAD_CHUNK_SIZE):
+        while chunk:
+            in_member = True
+            *complete, pending = (pending + member.decompress(chunk)).split(b"\n")
+            lines.extend(complete)
+            if not member.eof:
+                break
+            yield from filter(None, lines)
+            lines = []
+            chunk = member.unused_data
+            member = zlib.decompressobj(wbits=31)
+            in_member = False
+    if in_member:
+        yield None
+
+
+def _fsync_dir(path: Path) -> None:
+    """Flush a directory entry so a preceding rename survives a crash."""
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _next_id_ns() -> int:
+    """Return a wall-clock nanosecond stamp strictly greater than the last one.
+
+    Coarse clocks can report the same value for back-to-back calls, so the
+    previous stamp is bumped by one instead, keeping IDs unique per process.
+    """
+    global _last_id_ns
+    with _id_lock:
+        _last_id_ns = max(time.time_ns(), _last_id_ns + 1)
+        return _last_id_ns
+
 
 class SessionError(Exception):
     """Base exception for session-related errors.
@@ -54,6 +195,13 @@ class Session:
         self.messages: list[dict[str, Any]] = []
         self.created_at = datetime.now().isoformat()
         self.updated_at = self.created_at
+        # Number of leading messages already written to the session log, or
+        # None when the log on disk is not known to match them
+        self._persisted_count: int | None = None
+        # Number of leading messages known to have reached stable storage
+        self._synced_count = 0
+        # Gzip members appended to the log since it was last rewritten whole
+        self._log_appends = 0
 
     def add_message(self, role: str, content: str) -> None:
         """Add message to conversation history.
@@ -62,10 +210,17 @@ class Session:
             role: Message role (user, assistant, tool)
             content: Message content
         """
-        self.messages.append(
-            {"role": role, "content": content, "timestamp": datetime.now().isoformat()}
-        )
-        self.updated_at = datetime.now().isoformat()
+        now = datetime.now().isoformat()
+        self.messages.append({"role": role, "content": content, "timestamp": now})
+        self.updated_at = now
+
+    def as_llm_messages(self) -> list[dict[str, Any]]:
+        """Return messages in chat-completion format, without timestamps.
+
+        Returns:
+            List of role/content message dictionaries
+        """
+        return [{"role": m["role"], "content": m["content"]} for m in self.messages]
 
     def to_dict(self) -> dict[str, Any]:
         """Convert session to dictionary for JSON serialization.
@@ -103,41 +258,110 @@ class SessionManager:
     Keywords: session, manager, persistence, file-based, JSON
 
     Manages session creation, saving, loading, and directory structure.
-    Sessions are stored in ~/.agent/sessions/ as JSON files.
+    Sessions are stored in ~/.agent/sessions/ as <id>.jsonl.gz message logs with
+    <id>.meta.json metadata; <id>.json snapshots from earlier versions are
+    still read. Saves requested with schedule_save are written by a
+    background thread that coalesces requests within a debounce window.
     """
 
-    def __init__(self, config_path: Path | None = None) -> None:
+    def __init__(
+        self,
+        config_path: Path | None = None,
+        debounce_seconds: float = SAVE_DEBOUNCE_SECONDS,
+    ) -> None:
         """Initialize session manager with configuration.
 
         Args:
             config_path: Path to configuration file (optional)
+            debounce_seconds: How long the background writer waits to
+                coalesce scheduled saves
         """
-        self.config = load_configuration(config_path)
+        self._config_path = config_path
+        self._config: dict[str, Any] | None = None
         self.sessions_dir = Path.home() / ".agent" / "sessions"
-        self._ensure_sessions_directory()
+        # String prefix for existence checks that skip Path construction
+        self._sessions_dir_str = os.path.join(self.sessions_dir, "")
+        self._path_cache: dict[str, Path] = {}
+        self._dir_ready = False
+        self._index: list[str] | None = None
+        self._index_mtime_ns = 0
+        self._debounce_s = debounce_seconds
+        # Serializes file writes between callers and the background writer
+        self._write_lock = threading.Lock()
+        self._save_queue: queue.Queue[Session | None] = queue.Queue()
+        self._writer: threading.Thread | None = None
+        self._save_error: SessionError | None = None
+
+    @property
+    def config(self) -> dict[str, Any]:
+        """Configuration, loaded on first access."""
+        if self._config is None:
+            self._config = load_configuration(self._config_path)
+        return self._config
 
     def _ensure_sessions_directory(self) -> None:
-        """Create sessions directory if it doesn't exist."""
+        """Create sessions directory if it doesn't exist.
+
+        This runs on the first write rather than at construction, so callers
+        that only list or read sessions never touch the filesystem for it.
+        """
+        if self._dir_ready:
+            return
         self.sessions_dir.mkdir(parents=True, exist_ok=True)
+        self._dir_ready = True
 
     def _generate_session_id(self) -> str:
         """Generate unique session ID based on current timestamp.
 
         Returns:
-            Session ID in format: YYYY-MM-DD-HH-MM-SS
+            Session ID in format: YYYY-MM-DD-HH-MM-SS-NNNNNNNNN, where the
+            last field is the nanosecond part of the timestamp
         """
-        return datetime.now().strftime("%Y-%m-%d-%H-%M-%S")
+        ns = _next_id_ns()
+        seconds, fraction = divmod(ns, 1_000_000_000)
+        stamp = time.strftime("%Y-%m-%d-%H-%M-%S", time.localtime(seconds))
+        return f"{stamp}-{fraction:09d}"
 
     def _get_session_path(self, session_id: str) -> Path:
-        """Get file path for session ID.
+        """Get message log path for session ID.
+
+        Args:
+            session_id: Session identifier
+
+        Returns:
+            Path to compressed session JSONL log
+        """
+        path = self._path_cache.get(session_id)
+        if path is None:
+            path = self.sessions_dir / f"{session_id}{LOG_SUFFIX}"
+            self._path_cache[session_id] = path
+        return path
+
+    def _get_meta_path(self, session_id: str) -> Path:
+        """Get metadata sidecar path for session ID.
 
         Args:
             session_id: Session identifier
 
         Returns:
-            Path to session file
+            Path to session metadata file
         """
-        return self.sessions_dir / f"{session_id}.json"
+        return self.sessions_dir / f"{session_id}{META_SUFFIX}"
+
+    def _get_legacy_path(self, session_id: str) -> Path:
+        """Get path of a full JSON snapshot written by earlier versions.
+
+        Args:
+            session_id: Session identifier
+
+        Returns:
+            Path to legacy session file
+        """
+        return self.sessions_dir / f"{session_id}{LEGACY_SUFFIX}"
+
+    def _file_exists(self, session_id: str, suffix: str) -> bool:
+        """Check for a regular session file with one stat on a string path."""
+        return os.path.isfile(self._sessions_dir_str + session_id + suffix)
 
     def create_session(self) -> Session:
         """Create new session with generated ID.
@@ -148,8 +372,77 @@ class SessionManager:
         session_id = self._generate_session_id()
         return Session(session_id)
 
+    def _atomic_write(self, path: Path, data: bytes) -> None:
+        """Write data to a temporary sibling file and replace path with it.
+
+        Raises:
+            OSError: If the write or replace fails
+        """
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+            raise
+
+    def _write_messages(self, session: Session, sync: bool) -> None:
+        """Write messages not yet on disk to the session log.
+
+        New messages are appended, so the cost is proportional to the number
+        of messages since the last write. The log is rewritten atomically
+        instead when nothing is known to be on disk yet (a new session, one
+        loaded from a legacy snapshot or a torn log) or the history shrank.
+        Each append adds a separate gzip member, and a member holding a
+        message or two barely compresses, so every LOG_COMPACT_APPENDS
+        appends the log is also rewritten as full-size members.
+
+        Args:
+            session: Session to persist
+            sync: Flush the log to stable storage, including lines appended
+                earlier without sync
+
+        Raises:
+            OSError: If writing the log fails
+        """
+        # Snapshot the length first: messages may be appended concurrently
+        end = len(session.messages)
+        start = session._persisted_count
+        if start == end and (not sync or session._synced_count == end):
+            return
+        log_path = self._get_session_path(session.session_id)
+        if (
+            start is None
+            or start > end
+            or (start < end and session._log_appends >= LOG_COMPACT_APPENDS)
+        ):
+            self._atomic_write(log_path, _dump_lines(session.messages[:end], 0))
+            self._index = None
+            # Sync the rename before dropping the snapshot it supersedes.
+            _fsync_dir(self.sessions_dir)
+            self._get_legacy_path(session.session_id).unlink(missing_ok=True)
+            session._synced_count = end
+            session._log_appends = 0
+        else:
+            with open(log_path, "ab") as f:
+                if start < end:
+                    f.write(_dump_lines(session.messages[start:end], start))
+                    session._log_appends += 1
+                if sync:
+                    f.flush()
+                    os.fsync(f.fileno())
+                    session._synced_count = end
+        session._persisted_count = end
+
     def save_session(self, session: Session) -> None:
-        """Save session to JSON file.
+        """Save session to its JSONL log and metadata sidecar.
+
+        Only messages added since the last write are appended to the log;
+        the small metadata file is replaced atomically, so a crash mid-write
+        never leaves a truncated session behind.
 
         Args:
             session: Session to save
@@ -157,17 +450,147 @@ class SessionManager:
         Raises:
             SessionError: If save operation fails
         """
+        meta = {
+            "session_id": session.session_id,
+            "created_at": session.created_at,
+            "updated_at": session.updated_at,
+        }
         try:
-            session_path = self._get_session_path(session.session_id)
-            with open(session_path, "w", encoding="utf-8") as f:
-                json.dump(session.to_dict(), f, indent=2, ensure_ascii=False)
+            with self._write_lock:
+                self._ensure_sessions_directory()
+                self._write_messages(session, sync=True)
+                self._atomic_write(
+                    self._get_meta_path(session.session_id),
+                    _dumps(meta, indent=True),
+                )
         except OSError as e:
             raise SessionError(
                 f"Failed to save session {session.session_id}: {e}"
             ) from e
 
+    def append_message(self, session: Session) -> None:
+        """Append the session's unsaved messages to its log.
+
+        This writes only the new messages, so per-turn I/O does not grow with
+        the session length. The metadata sidecar is refreshed by the next
+        save_session call.
+
+        Args:
+            session: Session whose new messages should be written
+
+        Raises:
+            SessionError: If append operation fails
+        """
+        if not session.messages:
+            return
+        try:
+            with self._write_lock:
+                self._ensure_sessions_directory()
+                self._write_messages(session, sync=False)
+        except OSError as e:
+            raise SessionError(
+                f"Failed to append to session {session.session_id}: {e}"
+            ) from e
+
+    def schedule_save(self, session: Session) -> None:
+        """Queue session to be saved by the background writer.
+
+        Requests arriving within the debounce window are coalesced, so a
+        burst of turns costs at most one save per session. Use flush, close
+        or save_session to make sure the session has reached the disk.
+
+        Args:
+            session: Session to save
+
+        Raises:
+            SessionError: If an earlier background save failed
+        """
+        self._raise_save_error()
+        if self._writer is None:
+            self._writer = threading.Thread(
+                target=self._run_writer, name="session-writer", daemon=True
+            )
+            self._writer.start()
+        self._save_queue.put(session)
+
+    def _run_writer(self) -> None:
+        """Save queued sessions until a None sentinel is received."""
+        while True:
+            batch = [self._save_queue.get()]
+            if batch[0] is not None:
+                time.sleep(self._debounce_s)
+                while True:
+                    try:
+                        batch.append(self._save_queue.get_nowait())
+                    except queue.Empty:
+                        break
+            latest = {s.session_id: s for s in batch if s is not None}
+            for session in latest.values():
+                try:
+                    self.save_session(session)
+                except SessionError as e:
+                    self._save_error = e
+            for _ in batch:
+                self._save_queue.task_done()
+            if any(s is None for s in batch):
+                return
+
+    def _raise_save_error(self) -> None:
+        """Re-raise the last background save failure, if any."""
+        error, self._save_error = self._save_error, None
+        if error is not None:
+            raise error
+
+    def flush(self) -> None:
+        """Wait until all scheduled saves have been written.
+
+        Raises:
+            SessionError: If a background save failed
+        """
+        self._save_queue.join()
+        self._raise_save_error()
+
+    def close(self) -> None:
+        """Write scheduled saves and stop the background writer.
+
+        Raises:
+            SessionError: If a background save failed
+        """
+        if self._writer is not None:
+            self._save_queue.put(None)
+            self._writer.join()
+            self._writer = None
+        self._raise_save_error()
+
+    def _replay_log(self, session: Session) -> bool:
+        """Apply logged messages newer than those in session.
+
+        Entries already present (from a legacy snapshot) are skipped by index.
+        The log is decoded one line at a time instead of being read whole. A
+        truncated final gzip member from an interrupted append is ignored.
+
+        Returns:
+            False if a truncated final member was found, True otherwise
+        """
+        try:
+            with open(self._get_session_path(session.session_id), "rb") as f:
+                for line in _iter_log_lines(f):
+                    if line is None:
+                        return False
+                    entry = _loads(line)
+                    index = entry.pop("index")
+                    if index >= len(session.messages):
+                        session.messages.append(entry)
+                        session.updated_at = entry.get("timestamp", session.updated_at)
+        except FileNotFoundError:
+            return True
+        return True
+
     def load_session(self, session_id: str) -> Session:
-        """Load session from JSON file.
+        """Load session from its JSONL log and metadata sidecar.
+
+        Sessions saved as a single JSON snapshot by earlier versions are
+        still loaded, and are migrated to the log format on the next save.
 
         Args:
             session_id: Session identifier to load
@@ -178,27 +601,65 @@ class SessionManager:
         Raises:
             SessionError: If session file not found or invalid
         """
-        session_path = self._get_session_path(session_id)
-
-        if not session_path.exists():
+        if not self.session_exists(session_id):
             raise SessionError(f"Session not found: {session_id}")
 
+        has_meta = self._file_exists(session_id, META_SUFFIX)
         try:
-            with open(session_path, encoding="utf-8") as f:
-                data = json.load(f)
-            return Session.from_dict(data)
-        except (OSError, json.JSONDecodeError) as e:
+            if self._file_exists(session_id, LEGACY_SUFFIX):
+                with open(self._get_legacy_path(session_id), "rb") as f:
+                    session = Session.from_dict(_loads(f.read()))
+                self._replay_log(session)
+                return session
+            session = Session(session_id)
+            if has_meta:
+                with open(self._get_meta_path(session_id), "rb") as f:
+                    meta = _loads(f.read())
+                session.created_at = meta["created_at"]
+                session.updated_at = meta["updated_at"]
+            clean = self._replay_log(session)
+            if not has_meta and session.messages:
+                session.created_at = session.messages[0].get(
+                    "timestamp", session.created_at
+                )
+            if clean:
+                session._persisted_count = len(session.messages)
+                session._synced_count = len(session.messages)
+            return session
+        except (OSError, zlib.error, json.JSONDecodeError, KeyError) as e:
             raise SessionError(f"Failed to load session {session_id}: {e}") from e
 
     def list_sessions(self) -> list[str]:
         """List all available session IDs.
 
+        The sorted index is cached until the sessions directory's mtime
+        changes (or this manager creates a session log), so repeated calls
+        do not rescan the directory.
+
         Returns:
             List of session IDs sorted by creation date (newest first)
         """
-        session_files = list(self.sessions_dir.glob("*.json"))
-        session_ids = [f.stem for f in session_files]
-        return sorted(session_ids, reverse=True)  # Newest first
+        try:
+            mtime_ns = self.sessions_dir.stat().st_mtime_ns
+        except FileNotFoundError:
+            return []
+        if self._index is None or mtime_ns != self._index_mtime_ns:
+            session_ids = set()
+            with os.scandir(self.sessions_dir) as entries:
+                for entry in entries:
+                    name = entry.name
+                    # d_type from the directory listing; no per-entry stat
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+                    if name.endswith(LOG_SUFFIX):
+                        session_ids.add(name[: -len(LOG_SUFFIX)])
+                    elif name.endswith(LEGACY_SUFFIX) and not name.endswith(
+                        META_SUFFIX
+                    ):
+                        session_ids.add(name[: -len(LEGACY_SUFFIX)])
+            self._index = sorted(session_ids, reverse=True)  # Newest first
+            self._index_mtime_ns = mtime_ns
+        return list(self._index)
 
     def session_exists(self, session_id: str) -> bool:
         """Check if session exists.
@@ -209,4 +670,68 @@ class SessionManager:
         Returns:
             True if session exists, False otherwise
         """
-        return self._get_session_path(session_id).exists()
+        return self._file_exists(session_id, LOG_SUFFIX) or self._file_exists(
+            session_id, LEGACY_SUFFIX
+        )
+
+
+class AsyncSessionManager:
+    """Asyncio front end for SessionManager.
+
+    Keywords: session, manager, async, asyncio, persistence, non-blocking
+
+    File I/O runs on a worker thread via asyncio.to_thread, so awaiting a
+    save does not block the event loop. Several sessions can be saved in
+    one batch that shares a single thread hop.
+    """
+
+    def __init__(self, manager: SessionManager | None = None) -> None:
+        """Initialize async session manager.
+
+        Args:
+            manager: Synchronous manager to delegate to (default: a new
+                SessionManager)
+        """
+        self.manager = manager or SessionManager()
+
+    async def save_session(self, session: Session) -> None:
+        """Save session without blocking the event loop.
+
+        Raises:
+            SessionError: If save operation fails
+        """
+        await asyncio.to_thread(self.manager.save_session, session)
+
+    async def save_sessions(self, sessions: Iterable[Session]) -> None:
+        """Save several sessions in one worker-thread call.
+
+        Raises:
+            SessionError: If any save fails; later sessions are not saved
+        """
+        batch = list(sessions)
+
+        def save_all() -> None:
+            for session in batch:
+                self.manager.save_session(session)
+
+        await asyncio.to_thread(save_all)
+
+    async def append_message(self, session: Session) -> None:
+        """Append the session's unsaved messages without blocking.
+
+        Raises:
+            SessionError: If append operation fails
+        """
+        await asyncio.to_thread(self.manager.append_message, session)
+
+    async def load_session(self, session_id: str) -> Session:
+        """Load session without blocking the event loop.
+
+        Raises:
+            SessionError: If session file not found or invalid
+        """
+        return await asyncio.to_thread(self.manager.load_session, session_id)
+
+    async def list_sessions(self) -> list[str]:
+        """List session IDs without blocking the event loop."""
+        return await asyncio.to_thread(self.manager.list_sessions)
@@ -8,6 +8,8 @@ Keywords: api, litellm, integration, testing, openai, anthropic, model, provider
 """
 
 import os
+from collections.abc import Callable, Iterator
+from dataclasses import replace
 from typing import Any
 
 import pytest
@@ -17,7 +19,11 @@ from python_agent.config import get_default_config
 
 
 class TestLiteLLMIntegration:
-    """Test LiteLLM integration with real model providers."""
+    """Test LiteLLM integration with real model providers.
+
+    Agents for the default provider models are built once per class and
+    shared between tests; their conversation history is cleared per test.
+    """
 
     def _get_api_key(self, env_var: str) -> str | None:
         """Get API key from environment with proper handling."""
@@ -32,36 +38,83 @@ class TestLiteLLMIntegration:
                 f"Skipping {provider} API test: no API key provided (set {env_var})"
             )
 
-    def _create_test_config(
-        self, api_key: str, model: str, base_url: str | None = None
-    ) -> dict[str, Any]:
-        """Create test configuration with API credentials."""
-        config = get_default_config()
-        config.update(
-            {
+    @pytest.fixture(scope="class")
+    def config_factory(self) -> Callable[..., dict[str, Any]]:
+        """Return a function that creates test configuration."""
+        defaults = get_default_config()
+
+        def create(
+            api_key: str, model: str, base_url: str | None = None, **overrides: Any
+        ) -> dict[str, Any]:
+            """Create test configuration with API credentials."""
+            config = {
+                **defaults,
                 "api_key": api_key,
                 "model": model,
                 "max_tokens": 100,  # Keep responses small for testing
                 "temperature": 0.1,  # Consistent responses
                 "tools_enabled": False,  # Disable tools for API tests
                 "confirmation_required": False,
+                **overrides,
             }
-        )
-        if base_url:
-            config["base_url"] = base_url
-        return config
+            if base_url:
+                config["base_url"] = base_url
+            return config
 
-    @pytest.mark.api
-    def test_openai_gpt_integration_chat_completion(self):
-        """Test successful chat completion with OpenAI GPT models."""
+        return create
+
+    @pytest.fixture(scope="class")
+    def openai_key(self) -> str:
+        """Return the OpenAI API key, skipping the tests that need it."""
         api_key = self._get_api_key("OPENAI_API_KEY")
         self._skip_if_no_api_key(api_key, "OpenAI", "OPENAI_API_KEY")
+        assert api_key is not None
+        return api_key
 
-        config = self._create_test_config(api_key, "gpt-3.5-turbo")
-        agent = Agent(config)
+    @pytest.fixture(scope="class")
+    def gemini_key(self) -> str:
+        """Return the Google Gemini API key, skipping the tests that need it."""
+        api_key = self._get_api_key("GEMINI_API_KEY")
+        self._skip_if_no_api_key(api_key, "Google Gemini", "GEMINI_API_KEY")
+        assert api_key is not None
+        return api_key
+
+    @pytest.fixture(scope="class")
+    def shared_openai_agent(
+        self, openai_key: str, config_factory: Callable[..., dict[str, Any]]
+    ) -> Iterator[Agent]:
+        """Build one OpenAI agent for the class."""
+        agent = Agent(config_factory(openai_key, "gpt-3.5-turbo"))
+        yield agent
+        agent.close()
+
+    @pytest.fixture(scope="class")
+    def shared_gemini_agent(
+        self, gemini_key: str, config_factory: Callable[..., dict[str, Any]]
+    ) -> Iterator[Agent]:
+        """Build one Google Gemini agent for the class."""
+        agent = Agent(config_factory(gemini_key, "gemini/gemini-1.5-flash"))
+        yield agent
+        agent.close()
+
+    @pytest.fixture
+    def openai_agent(self, shared_openai_agent: Agent) -> Agent:
+        """Return the shared OpenAI agent with an empty history."""
+        shared_openai_agent.conversation_history.clear()
+        return shared_openai_agent
+
+    @pytest.fixture
+    def gemini_agent(self, shared_gemini_agent: Agent) -> Agent:
+        """Return the shared Google Gemini agent with an empty history."""
+        shared_gemini_agent.conversation_history.clear()
+        return shared_gemini_agent
 
+    @pytest.mark.api
+    @pytest.mark.xdist_group(name="provider_openai")
+    def test_openai_gpt_integration_chat_completion(self, openai_agent):
+        """Test successful chat completion with OpenAI GPT models."""
         # Test simple chat completion
-        response = agent.chat_completion(
+        response = openai_agent.chat_completion(
             [{"role": "user", "content": "Say 'Hello, World!' and nothing else."}]
         )
 
@@ -71,13 +124,13 @@ class TestLiteLLMIntegration:
         assert "Hello" in response or "hello" in response
 
     @pytest.mark.api
-    def test_anthropic_claude_integration_chat_completion(self):
+    @pytest.mark.xdist_group(name="provider_anthropic")
+    def test_anthropic_claude_integration_chat_completion(self, config_factory):
         """Test successful chat completion with Anthropic Claude models."""
         api_key = self._get_api_key("ANTHROPIC_API_KEY")
         self._skip_if_no_api_key(api_key, "Anthropic", "ANTHROPIC_API_KEY")
 
-        config = self._create_test_config(api_key, "claude-3-5-haiku-latest")
-        agent = Agent(config)
+        agent = Agent(config_factory(api_key, "claude-3-5-haiku-latest"))
 
         # Test simple chat completion
         response = agent.chat_completion(
@@ -89,16 +142,11 @@ class TestLiteLLMIntegration:
         assert len(response) > 0
 
     @pytest.mark.api
-    def test_google_gemini_integration_chat_completion(self):
+    @pytest.mark.xdist_group(name="provider_gemini")
+    def test_google_gemini_integration_chat_completion(self, gemini_agent):
         """Test successful chat completion with Google Gemini models."""
-        api_key = self._get_api_key("GEMINI_API_KEY")
-        self._skip_if_no_api_key(api_key, "Google Gemini", "GEMINI_API_KEY")
-
-        config = self._create_test_config(api_key, "gemini/gemini-1.5-flash")
-        agent = Agent(config)
-
         # Test simple chat completion
-        response = agent.chat_completion(
+        response = gemini_agent.chat_completion(
             [{"role": "user", "content": "Say hello in exactly 3 words."}]
         )
 
@@ -107,21 +155,16 @@ class TestLiteLLMIntegration:
         assert len(response) > 0
 
     @pytest.mark.api
-    def test_openai_conversation_history_management(self):
+    @pytest.mark.xdist_group(name="provider_gemini")
+    def test_openai_conversation_history_management(self, gemini_agent):
         """Test conversation history handling with multiple messages."""
-        api_key = self._get_api_key("GEMINI_API_KEY")
-        self._skip_if_no_api_key(api_key, "Google Gemini", "GEMINI_API_KEY")
-
-        config = self._create_test_config(api_key, "gemini/gemini-1.5-flash")
-        agent = Agent(config)
-
         # Add multiple messages to conversation
-        agent.add_message("user", "My name is TestUser")
-        agent.add_message("assistant", "Hello TestUser!")
-        agent.add_message("user", "What is my name?")
+        gemini_agent.add_message("user", "My name is TestUser")
+        gemini_agent.add_message("assistant", "Hello TestUser!")
+        gemini_agent.add_message("user", "What is my name?")
 
         # Test that conversation history is maintained
-        response = agent.chat_completion(agent.conversation_history)
+        response = gemini_agent.chat_completion(gemini_agent.conversation_history)
 
         assert response is not None
         assert isinstance(response, str)
@@ -130,10 +173,10 @@ class TestLiteLLMIntegration:
         assert "TestUser" in response or "test" in response.lower()
 
     @pytest.mark.api
-    def test_api_error_handling_invalid_key(self):
+    @pytest.mark.xdist_group(name="provider_openai")
+    def test_api_error_handling_invalid_key(self, config_factory):
         """Test proper error handling for invalid API keys."""
-        config = self._create_test_config("invalid_key_12345", "gpt-3.5-turbo")
-        agent = Agent(config)
+        agent = Agent(config_factory("invalid_key_12345", "gpt-3.5-turbo"))
 
         # Should raise ModelError for invalid authentication
         with pytest.raises(ModelError) as exc_info:
@@ -147,13 +190,10 @@ class TestLiteLLMIntegration:
         )
 
     @pytest.mark.api
-    def test_api_error_handling_invalid_model(self):
+    @pytest.mark.xdist_group(name="provider_gemini")
+    def test_api_error_handling_invalid_model(self, gemini_key, config_factory):
         """Test proper error handling for invalid model names."""
-        api_key = self._get_api_key("GEMINI_API_KEY")
-        self._skip_if_no_api_key(api_key, "Google Gemini", "GEMINI_API_KEY")
-
-        config = self._create_test_config(api_key, "nonexistent-model-12345")
-        agent = Agent(config)
+        agent = Agent(config_factory(gemini_key, "nonexistent-model-12345"))
 
         # Should raise ModelError for invalid model
         with pytest.raises(ModelError) as exc_info:
@@ -167,16 +207,11 @@ class TestLiteLLMIntegration:
         )
 
     @pytest.mark.api
-    def test_process_single_prompt_integration(self):
+    @pytest.mark.xdist_group(name="provider_gemini")
+    def test_process_single_prompt_integration(self, gemini_agent):
         """Test process_single_prompt method with real API."""
-        api_key = self._get_api_key("GEMINI_API_KEY")
-        self._skip_if_no_api_key(api_key, "Google Gemini", "GEMINI_API_KEY")
-
-        config = self._create_test_config(api_key, "gemini/gemini-1.5-flash")
-        agent = Agent(config)
-
         # Test single prompt processing
-        response = agent.process_single_prompt(
+        response = gemini_agent.process_single_prompt(
             "Respond with 'Single prompt test successful'"
         )
 
@@ -185,21 +220,21 @@ class TestLiteLLMIntegration:
         assert len(response) > 0
 
         # Verify conversation history was updated
-        assert len(agent.conversation_history) == 2  # user + assistant messages
-        assert agent.conversation_history[0]["role"] == "user"
-        assert agent.conversation_history[1]["role"] == "assistant"
+        history = gemini_agent.conversation_history
+        assert len(history) == 2  # user + assistant messages
+        assert history[0]["role"] == "user"
+        assert history[1]["role"] == "assistant"
 
     @pytest.mark.api
-    def test_custom_base_url_configuration(self):
+    @pytest.mark.xdist_group(name="provider_openai")
+    def test_custom_base_url_configuration(self, openai_key, config_factory):
         """Test configuration with custom base URL."""
-        api_key = self._get_api_key("OPENAI_API_KEY")
-        self._skip_if_no_api_key(api_key, "OpenAI", "OPENAI_API_KEY")
-
         # Test with OpenAI's actual base URL (should work)
-        config = self._create_test_config(
-            api_key, "gpt-3.5-turbo", base_url="https://api.openai.com/v1"
+        agent = Agent(
+            config_factory(
+                openai_key, "gpt-3.5-turbo", base_url="https://api.openai.com/v1"
+            )
         )
-        agent = Agent(config)
 
         response = agent.chat_completion(
             [{"role": "user", "content": "Say 'Custom base URL test'"}]
@@ -210,17 +245,14 @@ class TestLiteLLMIntegration:
         assert len(response) > 0
 
     @pytest.mark.api
-    def test_temperature_and_max_tokens_configuration(self):
+    @pytest.mark.xdist_group(name="provider_gemini")
+    def test_temperature_and_max_tokens_configuration(self, gemini_key, config_factory):
         """Test that temperature and max_tokens configuration is respected."""
-        api_key = self._get_api_key("GEMINI_API_KEY")
-        self._skip_if_no_api_key(api_key, "Google Gemini", "GEMINI_API_KEY")
-
-        config = self._create_test_config(api_key, "gemini/gemini-1.5-flash")
-        config.update(
-            {
-                "temperature": 0.0,  # Very deterministic
-                "max_tokens": 10,  # Very short response
-            }
+        config = config_factory(
+            gemini_key,
+            "gemini/gemini-1.5-flash",
+            temperature=0.0,  # Very deterministic
+            max_tokens=10,  # Very short response
         )
         agent = Agent(config)
 
@@ -239,13 +271,11 @@ class TestLiteLLMIntegration:
         assert len(response.split()) <= 15  # Allow some flexibility
 
     @pytest.mark.api
-    def test_empty_content_handling(self):
+    @pytest.mark.xdist_group(name="provider_gemini")
+    def test_empty_content_handling(self, gemini_key, config_factory):
         """Test handling of responses with empty or None content."""
-        api_key = self._get_api_key("GEMINI_API_KEY")
-        self._skip_if_no_api_key(api_key, "Google Gemini", "GEMINI_API_KEY")
-
-        config = self._create_test_config(api_key, "gemini/gemini-1.5-flash")
-        config["max_tokens"] = 1  # Very limited to potentially get empty responses
+        # Very limited to potentially get empty responses
+        config = config_factory(gemini_key, "gemini/gemini-1.5-flash", max_tokens=1)
         agent = Agent(config)
 
         # This might produce a very short or empty response
@@ -279,6 +309,7 @@ class TestLiteLLMConversationWorkflows:
         return Agent(config)
 
     @pytest.mark.api
+    @pytest.mark.xdist_group(name="provider_gemini")
     def test_multi_turn_conversation_workflow(self):
         """Test multi-turn conversation with context preservation."""
         api_key = self._get_openai_key()
@@ -308,6 +339,7 @@ class TestLiteLLMConversationWorkflows:
         assert "3" in response3 or "three" in response3.lower()
 
     @pytest.mark.api
+    @pytest.mark.xdist_group(name="provider_gemini")
     def test_conversation_with_session_management(self):
         """Test conversation workflow with session persistence."""
         api_key = self._get_openai_key()
@@ -346,6 +378,7 @@ class TestLiteLLMConversationWorkflows:
         assert "blue" in response.lower()
 
     @pytest.mark.api
+    @pytest.mark.xdist_group(name="provider_gemini")
     def test_error_recovery_workflow(self):
         """Test conversation recovery after API errors."""
         api_key = self._get_openai_key()
@@ -362,8 +395,8 @@ class TestLiteLLMConversationWorkflows:
         history_length = len(agent.conversation_history)
 
         # Simulate error by temporarily changing to invalid model
-        original_config = agent.config.copy()
-        agent.config["model"] = "invalid-model-name"
+        original_config = agent.config
+        agent.config = replace(agent.config, model="invalid-model-name")
 
         # This should fail
         with pytest.raises(ModelError):
@@ -0,0 +1,31 @@
+"""Shared pytest configuration.
+
+Keywords: test, pytest, conftest, litellm, tmpfs
+"""
+
+import os
+import sys
+import tempfile
+
+# Use litellm's bundled model cost map. Otherwise importing litellm starts a
+# background thread that fetches the remote map and can deadlock with imports
+# running in the main thread.
+os.environ.setdefault("LITELLM_LOCAL_MODEL_COST_MAP", "True")
+
+SHM_DIR = "/dev/shm"
+
+
+def pytest_configure(config):
+    """Keep test scratch files on RAM-backed tmpfs when it is available.
+
+    Both tempfile and pytest's tmp_path fixtures then skip the disk. An
+    explicit TMPDIR wins, and AGENT_TEST_NO_TMPFS=1 opts out for machines
+    with a small /dev/shm.
+    """
+    if (
+        sys.platform == "linux"
+        and "TMPDIR" not in os.environ
+        and os.environ.get("AGENT_TEST_NO_TMPFS") != "1"
+        and os.access(SHM_DIR, os.W_OK | os.X_OK)
+    ):
+        tempfile.tempdir = SHM_DIR
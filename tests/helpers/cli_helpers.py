@@ -6,33 +6,108 @@ result validation, and test data management for integration and e2e tests.
 Keywords: CLI, testing, helpers, utilities, integration, subprocess
 """
 
+import functools
+import json
+import math
+import os
+import re
 import subprocess
+import sys
+from collections.abc import Mapping
+from dataclasses import dataclass
 from pathlib import Path
-from typing import NamedTuple
+from types import MappingProxyType
+from typing import Literal
 
 import yaml
-
-
-class CLITestResult(NamedTuple):
+from click.testing import CliRunner
+
+from python_agent.cli import main
+
+YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+# Run the CLI with this interpreter rather than `uv run`, which re-checks the
+# lockfile and environment on every call
+AGENT_COMMAND = [sys.executable, "-m", "python_agent"]
+
+BASELINE_ENV_KEYS = (
+    "PATH",
+    "HOME",
+    "LANG",
+    "LC_ALL",
+    "PYTHONPATH",
+    "LITELLM_LOCAL_MODEL_COST_MAP",
+)
+
+REQUIRED_HELP_ELEMENTS = (
+    "Usage:",
+    "--prompt",
+    "--file",
+    "--resume",
+    "--config",
+    "--allow-tools",
+    "--no-tools",
+    "--confirm",
+    "--no-confirm",
+    "--verbose",
+    "--quiet",
+    "--help",
+)
+HELP_ELEMENT_PATTERN = re.compile(
+    "|".join(re.escape(element) for element in REQUIRED_HELP_ELEMENTS)
+)
+
+INVALID_YAML_BYTES = b"invalid: yaml: content: [missing bracket"
+
+
+@dataclass(frozen=True, slots=True)
+class CLITestResult:
     """Structured result from CLI test execution.
 
     Keywords: CLI, test, result, testing utilities
     """
 
     exit_code: int
-    stdout: str
-    stderr: str
+    stdout: str | bytes
+    stderr: str | bytes
     success: bool
     timed_out: bool
 
 
+@functools.lru_cache(maxsize=1)
+def baseline_env() -> Mapping[str, str]:
+    """Get the minimal environment for CLI subprocesses that set their own.
+
+    Built once per test run from the whitelisted BASELINE_ENV_KEYS, so tests
+    extend it with `{**baseline_env(), "HOME": ...}` instead of copying
+    the whole of os.environ for every spawn.
+
+    Keywords: environment, subprocess, baseline, cache, testing utilities
+
+    Returns:
+        Read-only mapping of the whitelisted variables that are set
+    """
+    return MappingProxyType(
+        {key: os.environ[key] for key in BASELINE_ENV_KEYS if key in os.environ}
+    )
+
+
 def execute_cli_command(
-    args: list[str], input_text: str = "", timeout: int = 10, cwd: str | None = None
+    args: list[str],
+    input_text: str = "",
+    timeout: int = 10,
+    cwd: str | None = None,
+    in_process: bool = True,
+    capture: Literal["both", "stdout", "stderr"] = "both",
+    decode: bool = True,
 ) -> CLITestResult:
     """Execute CLI command and return structured result.
 
     Executes the python_agent CLI with given arguments and returns
-    comprehensive result information for test validation.
+    comprehensive result information for test validation. By default the
+    CLI is invoked in-process with Click's CliRunner, which avoids paying
+    interpreter startup on every call; the timeout only applies to
+    subprocess runs.
 
     Keywords: CLI, command, execution, testing, subprocess
 
@@ -40,44 +115,96 @@ def execute_cli_command(
         args: Command line arguments to pass to agent CLI
         input_text: Optional stdin input for interactive commands
         timeout: Command timeout in seconds (default: 10)
-        cwd: Optional working directory for command execution
+        cwd: Optional working directory for command execution (forces a
+            subprocess)
+        in_process: Whether to invoke the CLI in this interpreter
+        capture: Output streams to collect from a subprocess; the other is
+            sent to /dev/null and returned empty
+        decode: Whether to decode output to str; tests that only check exit
+            codes or byte substrings pass False to skip the decode pass
 
     Returns:
         CLITestResult with exit code, output streams, and status flags
     """
-    cmd = ["uv", "run", "agent"] + args
+    if in_process and cwd is None:
+        result = CliRunner().invoke(main, args, input=input_text)
+        return CLITestResult(
+            exit_code=result.exit_code,
+            stdout=result.stdout if decode else result.stdout_bytes,
+            stderr=result.stderr if decode else result.stderr_bytes,
+            success=result.exit_code == 0,
+            timed_out=False,
+        )
+
+    cmd = AGENT_COMMAND + args
+    empty = "" if decode else b""
 
     try:
         result = subprocess.run(
             cmd,
-            input=input_text,
-            capture_output=True,
-            text=True,
+            input=input_text if decode else input_text.encode(),
+            stdout=subprocess.DEVNULL if capture == "stderr" else subprocess.PIPE,
+            stderr=subprocess.DEVNULL if capture == "stdout" else subprocess.PIPE,
+            text=decode,
             timeout=timeout,
             cwd=cwd,
         )
         return CLITestResult(
             exit_code=result.returncode,
-            stdout=result.stdout,
-            stderr=result.stderr,
+            stdout=result.stdout or empty,
+            stderr=result.stderr or empty,
             success=result.returncode == 0,
             timed_out=False,
         )
     except subprocess.TimeoutExpired:
+        message = "Command timed out"
         return CLITestResult(
             exit_code=-1,
-            stdout="",
-            stderr="Command timed out",
+            stdout=empty,
+            stderr=message if decode else message.encode(),
             success=False,
             timed_out=True,
         )
 
 
+def _is_flat_scalar(value: object) -> bool:
+    """Check whether json.dumps of value reads back as the same YAML scalar.
+
+    PyYAML treats exponent floats such as 1e-05 and JSON's Infinity/NaN as
+    strings, so those values go through the YAML dumper instead.
+    """
+    if isinstance(value, float):
+        return math.isfinite(value) and "e" not in repr(value)
+    return value is None or isinstance(value, str | int)
+
+
+def dump_flat_config(config_data: dict) -> str:
+    """Emit a flat mapping of scalars as YAML without PyYAML.
+
+    Values are written with json.dumps: JSON strings are valid YAML
+    double-quoted scalars, and JSON numbers, booleans, and null are read
+    back unchanged by the YAML loader.
+
+    Keywords: configuration, YAML, serialization, testing utilities
+
+    Args:
+        config_data: Mapping of identifier keys to flat scalar values
+
+    Returns:
+        YAML document text
+    """
+    return "".join(
+        f"{key}: {json.dumps(value)}\n" for key, value in config_data.items()
+    )
+
+
 def create_test_config_file(config_data: dict, temp_dir: Path) -> Path:
     """Create temporary configuration file for testing.
 
     Creates a YAML configuration file in the specified directory
-    with the provided configuration data.
+    with the provided configuration data. Flat configs of simple scalars,
+    which is every config the tests use, are emitted by dump_flat_config;
+    anything else goes through the YAML dumper.
 
     Keywords: configuration, test, YAML, file creation, testing utilities
 
@@ -90,8 +217,38 @@ def create_test_config_file(config_data: dict, temp_dir: Path) -> Path:
     """
     config_file = temp_dir / "test_config.yaml"
 
+    if all(
+        isinstance(key, str) and key.isidentifier() and _is_flat_scalar(value)
+        for key, value in config_data.items()
+    ):
+        config_file.write_text(dump_flat_config(config_data))
+    else:
+        with open(config_file, "w") as f:
+            yaml.dump(config_data, f, Dumper=YAML_DUMPER)
+
+    return config_file
+
+
+def create_test_config_file_json(config_data: dict, temp_dir: Path) -> Path:
+    """Create temporary JSON configuration file for testing.
+
+    JSON is valid YAML, so the agent loads the file through its normal
+    config path, while writing it skips the YAML emitter entirely. Prefer
+    this over create_test_config_file unless the test is about YAML itself.
+
+    Keywords: configuration, test, JSON, file creation, testing utilities
+
+    Args:
+        config_data: Dictionary containing configuration values
+        temp_dir: Directory to create the config file in
+
+    Returns:
+        Path to the created configuration file
+    """
+    config_file = temp_dir / "test_config.json"
+
     with open(config_file, "w") as f:
-        yaml.dump(config_data, f)
+        json.dump(config_data, f)
 
     return config_file
 
@@ -177,7 +334,8 @@ def assert_help_output_complete(stdout: str) -> None:
     """Assert that help output contains all required elements.
 
     Validates that CLI help output includes all necessary usage information,
-    options, and examples for comprehensive user guidance.
+    options, and examples for comprehensive user guidance. All required
+    elements are found in a single regex scan of the output.
 
     Keywords: help, assertion, CLI, documentation, usage validation
 
@@ -187,23 +345,10 @@ def assert_help_output_complete(stdout: str) -> None:
     Raises:
         AssertionError: If help output is incomplete
     """
-    required_elements = [
-        "Usage:",
-        "--prompt",
-        "--file",
-        "--resume",
-        "--config",
-        "--allow-tools",
-        "--no-tools",
-        "--confirm",
-        "--no-confirm",
-        "--verbose",
-        "--quiet",
-        "--help",
-    ]
-
-    for element in required_elements:
-        assert element in stdout, f"Help output missing required element: {element}"
+    missing = set(REQUIRED_HELP_ELEMENTS).difference(
+        HELP_ELEMENT_PATTERN.findall(stdout)
+    )
+    assert not missing, f"Help output missing required elements: {sorted(missing)}"
 
 
 def create_invalid_yaml_file(temp_dir: Path, filename: str = "invalid.yaml") -> Path:
@@ -222,7 +367,7 @@ def create_invalid_yaml_file(temp_dir: Path, filename: str = "invalid.yaml") ->
         Path to the created invalid YAML file
     """
     invalid_file = temp_dir / filename
-    invalid_file.write_text("invalid: yaml: content: [missing bracket")
+    invalid_file.write_bytes(INVALID_YAML_BYTES)
     return invalid_file
 
 
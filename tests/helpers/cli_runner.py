@@ -0,0 +1,159 @@
+"""Long-lived CLI runner process for subprocess-based tests.
+
+Spawning `python -m python_agent` per test pays interpreter startup and, for
+any command that reaches a model, the multi-second litellm import every time.
+The runner is one child process that stays up for the test session and
+invokes the CLI in-process with Click's CliRunner for each request, so those
+costs are paid once.
+
+Requests and replies are JSON lines: the parent writes
+{"args": [...], "input": "...", "discard_output": false} to the runner's
+stdin and reads {"exit_code": ..., "stdout": ..., "stderr": ...} from its
+stdout. With discard_output set, the reply carries an empty stdout.
+
+Keywords: CLI, testing, subprocess, runner, process pool, amortize
+"""
+
+import atexit
+import functools
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+from pathlib import Path
+from typing import IO, Any
+
+from click.testing import CliRunner
+
+from python_agent.cli import main
+from tests.helpers.cli_helpers import baseline_env
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def serve() -> None:
+    """Answer CLI requests from stdin until it is closed."""
+    channel = os.fdopen(os.dup(sys.stdout.fileno()), "w")
+    # Anything written straight to fd 1 must not corrupt the reply channel
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    for line in sys.stdin:
+        request = json.loads(line)
+        result = CliRunner().invoke(
+            main, request["args"], input=request["input"], prog_name="agent"
+        )
+        reply = {
+            "exit_code": result.exit_code,
+            "stdout": "" if request.get("discard_output") else result.stdout,
+            "stderr": result.stderr,
+        }
+        channel.write(json.dumps(reply) + "\n")
+        channel.flush()
+
+
+class CLIRunnerProcess:
+    """Client for a runner child process, restarted after a timeout.
+
+    Keywords: CLI, runner, subprocess, client, testing utilities
+    """
+
+    def __init__(self) -> None:
+        """Initialize client; the child starts on the first request."""
+        self._process: subprocess.Popen | None = None
+        self._replies: queue.Queue[dict[str, Any] | None] = queue.Queue()
+
+    def _start(self) -> subprocess.Popen:
+        """Start the runner child and a thread collecting its replies."""
+        process = subprocess.Popen(
+            [sys.executable, "-m", "tests.helpers.cli_runner"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            encoding="utf-8",
+            errors="replace",
+            cwd=REPO_ROOT,
+            env=baseline_env(),
+        )
+        self._replies = queue.Queue()
+        threading.Thread(
+            target=self._read_replies,
+            args=(process.stdout, self._replies),
+            daemon=True,
+        ).start()
+        self._process = process
+        return process
+
+    @staticmethod
+    def _read_replies(
+        stream: IO[str], replies: "queue.Queue[dict[str, Any] | None]"
+    ) -> None:
+        """Forward reply lines to the queue, then None once the child exits.
+
+        The thread owns the stream and closes it at EOF, which the child
+        reaches when it exits or is killed.
+        """
+        with stream:
+            for line in stream:
+                replies.put(json.loads(line))
+        replies.put(None)
+
+    def run(
+        self,
+        args: list[str],
+        input_text: str = "",
+        timeout: float = 10,
+        discard_output: bool = False,
+    ) -> dict[str, Any] | None:
+        """Invoke the CLI in the runner and wait for its reply.
+
+        Args:
+            args: Command line arguments to pass to agent CLI
+            input_text: Optional stdin input for interactive commands
+            timeout: Seconds to wait for the reply
+            discard_output: Whether to leave stdout out of the reply
+
+        Returns:
+            Reply with exit_code, stdout, and stderr, or None if the command
+            timed out or the runner died (the runner is then replaced)
+        """
+        process = self._process
+        if process is None or process.poll() is not None:
+            process = self._start()
+        assert process.stdin is not None
+        request = {
+            "args": args,
+            "input": input_text,
+            "discard_output": discard_output,
+        }
+        process.stdin.write(json.dumps(request) + "\n")
+        process.stdin.flush()
+        try:
+            reply = self._replies.get(timeout=timeout)
+        except queue.Empty:
+            reply = None
+        if reply is None:
+            self.close()
+        return reply
+
+    def close(self) -> None:
+        """Stop the runner child if it is running."""
+        process, self._process = self._process, None
+        if process is None:
+            return
+        process.kill()
+        process.wait()
+        if process.stdin is not None:
+            process.stdin.close()
+
+
+@functools.lru_cache(maxsize=1)
+def shared_runner() -> CLIRunnerProcess:
+    """Get the runner shared by this test process, stopped at exit."""
+    runner = CLIRunnerProcess()
+    atexit.register(runner.close)
+    return runner
+
+
+if __name__ == "__main__":
+    serve()
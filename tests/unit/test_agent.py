@@ -3,13 +3,46 @@
 Keywords: test, agent, litellm, conversation, chat, model, AI
 """
 
-from unittest.mock import Mock, patch
+import asyncio
+import contextlib
+import itertools
+import subprocess
+import sys
+import threading
+from dataclasses import replace
+from types import MappingProxyType, SimpleNamespace
+from unittest.mock import ANY, AsyncMock, Mock, call, patch
 
 import pytest
 
-from python_agent.agent import Agent, AgentError, ModelError
+from python_agent.agent import Agent, AgentError, ModelError, write_stream
 from python_agent.bash_tool import BashTool
-from python_agent.session import Session, SessionManager
+from python_agent.config import AgentConfig
+from python_agent.semantic_cache import SemanticCache
+from python_agent.session import Session, SessionError, SessionManager
+
+# Read-only, so tests can share it; Agent copies it into an AgentConfig
+BASE_CONFIG = MappingProxyType(
+    {"model": "test", "max_tokens": 100, "temperature": 0.7, "timeout": 30}
+)
+
+# Immutable, so one instance can be shared as a side_effect across tests
+HELLO_THEN_EXIT = ("Hello", "exit")
+
+
+def session_stub() -> SimpleNamespace:
+    """Stand in for a Session in tests that only need its id.
+
+    A plain namespace skips Mock's attribute machinery; only add_message,
+    which Agent.add_message forwards to, is a Mock.
+    """
+    return SimpleNamespace(session_id="test-session", add_message=Mock())
+
+
+def completion_response(content: str | None) -> SimpleNamespace:
+    """Build a litellm completion response carrying the given content."""
+    message = SimpleNamespace(content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
 
 
 class TestAgentError:
@@ -44,58 +77,89 @@ class TestModelError:
 class TestAgentInit:
     """Test suite for Agent initialization."""
 
-    def test_agent_initialization_with_minimal_config(self):
-        """Test Agent initialization with minimal configuration."""
-        config = {
-            "model": "gpt-3.5-turbo",
-            "max_tokens": 100,
-            "temperature": 0.7,
-            "timeout": 30,
-        }
-
-        agent = Agent(config)
+    @pytest.mark.parametrize(
+        "config",
+        [
+            pytest.param(
+                {
+                    "model": "gpt-3.5-turbo",
+                    "max_tokens": 100,
+                    "temperature": 0.7,
+                    "timeout": 30,
+                },
+                id="minimal",
+            ),
+            pytest.param(
+                {
+                    "model": "gpt-4",
+                    "max_tokens": 200,
+                    "temperature": 0.8,
+                    "timeout": 60,
+                    "confirmation_required": True,
+                    "tools_enabled": False,
+                    "base_url": "https://custom.api.url",
+                },
+                id="full",
+            ),
+        ],
+    )
+    def test_agent_initialization(self, config):
+        """Test Agent initialization from minimal and full configuration."""
+        # Patch the lazy loader rather than the module attribute, which would
+        # import litellm just to save the original
+        with patch("python_agent.agent._litellm") as mock_litellm:
+            agent = Agent(config)
 
-        assert agent.config == config
+        assert agent.config == AgentConfig.from_dict(config)
         assert agent.conversation_history == []
         assert isinstance(agent.session_manager, SessionManager)
         assert agent.current_session is None
         assert isinstance(agent.bash_tool, BashTool)
+        assert agent.bash_tool.confirmation_required is (
+            agent.config.confirmation_required
+        )
+        assert agent.bash_tool.timeout == config["timeout"]
+        assert agent.bash_tool.enabled is config.get("tools_enabled", True)
+        if "base_url" in config:
+            # litellm.api_base should be set to the base_url
+            assert mock_litellm.return_value.api_base == config["base_url"]
+        else:
+            # Without base_url, litellm should not even be loaded
+            mock_litellm.assert_not_called()
 
-    def test_agent_initialization_with_full_config(self):
-        """Test Agent initialization with full configuration."""
-        config = {
-            "model": "gpt-4",
-            "max_tokens": 200,
-            "temperature": 0.8,
-            "timeout": 60,
-            "confirmation_required": True,
-            "tools_enabled": False,
-            "base_url": "https://custom.api.url",
-        }
+    def test_agent_initialization_ignores_legacy_config_key(self):
+        """Test Agent accepts config files with options it does not use."""
+        agent = Agent({"model": "test", "confirm_commands": False})
 
-        with patch("python_agent.agent.litellm") as mock_litellm:
-            agent = Agent(config)
+        assert agent.config == AgentConfig.from_dict({"model": "test"})
 
-            assert agent.config == config
-            assert agent.bash_tool.confirmation_required is True
-            assert agent.bash_tool.timeout == 60
-            assert agent.bash_tool.enabled is False
-            # litellm.api_base should be set to the base_url
-            assert mock_litellm.api_base == "https://custom.api.url"
+    def test_agent_initialization_accepts_agent_config(self):
+        """Test Agent uses an AgentConfig instance as-is."""
+        config = AgentConfig.from_dict({"model": "test"})
 
-    def test_agent_initialization_without_base_url(self):
-        """Test Agent initialization without base_url in config."""
-        config = {
-            "model": "gpt-3.5-turbo",
-            "max_tokens": 100,
-            "temperature": 0.7,
-            "timeout": 30,
-        }
+        assert Agent(config).config is config
 
-        # Since no base_url in config, litellm.api_base should not be modified
-        agent = Agent(config)
 
-        assert agent.config == config
+class TestAgentLazyImports:
+    """Test suite for deferred heavy imports."""
+
+    def test_import_does_not_load_litellm_or_yaml(self):
+        """Test importing the agent module defers litellm and yaml."""
+        code = (
+            "import sys, python_agent.agent; "
+            "print('litellm' in sys.modules, 'yaml' in sys.modules)"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True
+        )
+
+        assert result.stdout.strip() == "False False"
+
+    def test_litellm_attribute_imports_on_access(self):
+        """Test module attribute access resolves the real litellm module."""
+        import python_agent.agent as agent_module
+
+        assert agent_module.litellm.__name__ == "litellm"
 
 
 class TestAgentAddMessage:
@@ -104,8 +168,9 @@ class TestAgentAddMessage:
     @pytest.fixture
     def agent(self):
         """Create Agent instance for testing."""
-        config = {"model": "test", "max_tokens": 100, "temperature": 0.7, "timeout": 30}
-        return Agent(config)
+        agent = Agent(BASE_CONFIG)
+        agent.session_manager.schedule_save = Mock()
+        return agent
 
     def test_add_message_to_conversation_history(self, agent):
         """Test adding message to conversation history."""
@@ -146,8 +211,23 @@ class TestAgentAddMessage:
             "content": "Test message",
         }
 
-        # Verify session.add_message was called
-        mock_session.add_message.assert_called_once_with("user", "Test message")
+        # Verify session.add_message was called and a save scheduled
+        assert mock_session.add_message.call_args_list == [call("user", "Test message")]
+        assert agent.session_manager.schedule_save.call_args_list == [
+            call(mock_session)
+        ]
+
+    def test_rapid_add_messages_coalesce_into_one_save(self):
+        """Test a burst of messages reaches the disk in a single save."""
+        agent = Agent(BASE_CONFIG)
+        agent.current_session = Session("test-burst")
+
+        with patch.object(agent.session_manager, "save_session") as mock_save:
+            for i in range(5):
+                agent.add_message("user", f"m{i}")
+            agent.session_manager.close()
+
+        mock_save.assert_called_once_with(agent.current_session)
 
 
 class TestAgentSessionManagement:
@@ -156,12 +236,13 @@ class TestAgentSessionManagement:
     @pytest.fixture
     def agent(self):
         """Create Agent instance for testing."""
-        config = {"model": "test", "max_tokens": 100, "temperature": 0.7, "timeout": 30}
-        return Agent(config)
+        return Agent(BASE_CONFIG)
 
     def test_start_new_session(self, agent):
         """Test starting a new session."""
-        mock_session = Mock(spec=Session)
+        # Sessions that are only passed around need no spec; keep spec=Session
+        # for mocks whose method calls are asserted
+        mock_session = Mock()
         agent.session_manager.create_session = Mock(return_value=mock_session)
 
         result = agent.start_new_session()
@@ -172,21 +253,23 @@ class TestAgentSessionManagement:
 
     def test_resume_from_session(self, agent):
         """Test resuming from an existing session."""
-        mock_session = Mock(spec=Session)
-        mock_session.messages = [
+        session = Session("test-session")
+        session.add_message("user", "Previous message")
+        session.add_message("assistant", "Previous response")
+
+        result = agent.resume_from_session(session)
+
+        assert agent.current_session == session
+        assert result == session
+        # Timestamps stay in the session and are not sent to the model
+        assert agent.conversation_history == [
             {"role": "user", "content": "Previous message"},
             {"role": "assistant", "content": "Previous response"},
         ]
 
-        result = agent.resume_from_session(mock_session)
-
-        assert agent.current_session == mock_session
-        assert result == mock_session
-        assert agent.conversation_history == mock_session.messages
-
     def test_save_current_session_with_session(self, agent):
         """Test saving current session when session exists."""
-        mock_session = Mock(spec=Session)
+        mock_session = Mock()
         agent.current_session = mock_session
         agent.session_manager.save_session = Mock()
 
@@ -203,6 +286,29 @@ class TestAgentSessionManagement:
 
         agent.session_manager.save_session.assert_not_called()
 
+    def test_save_current_session_flushes_scheduled_saves(self, agent):
+        """Test queued background saves finish before the final save."""
+        agent.current_session = Mock()
+        manager = Mock()
+        agent.session_manager = manager
+
+        agent.save_current_session()
+
+        assert manager.method_calls == [
+            call.flush(),
+            call.save_session(agent.current_session),
+        ]
+
+    def test_close_closes_tools_when_background_save_failed(self, agent):
+        """Test close surfaces a failed save but still releases resources."""
+        agent.session_manager.close = Mock(side_effect=SessionError("disk"))
+        agent.bash_tool.close = Mock()
+
+        with pytest.raises(SessionError, match="disk"):
+            agent.close()
+
+        agent.bash_tool.close.assert_called_once()
+
 
 class TestAgentChatCompletion:
     """Test suite for Agent.chat_completion method."""
@@ -218,14 +324,22 @@ class TestAgentChatCompletion:
         }
         return Agent(config)
 
-    @patch("python_agent.agent.litellm.completion")
+    @pytest.fixture(scope="class")
+    def completion_patch(self):
+        """Patch litellm.completion once for the whole class."""
+        with patch("python_agent.agent.litellm.completion") as mock:
+            yield mock
+
+    @pytest.fixture
+    def mock_completion(self, completion_patch):
+        """Hand each test the class-wide completion mock, freshly reset."""
+        completion_patch.reset_mock(return_value=True, side_effect=True)
+        return completion_patch
+
     def test_chat_completion_success(self, mock_completion, agent):
         """Test successful chat completion."""
         # Mock successful response
-        mock_response = Mock()
-        mock_response.choices = [Mock()]
-        mock_response.choices[0].message.content = "Test response"
-        mock_completion.return_value = mock_response
+        mock_completion.return_value = completion_response("Test response")
 
         messages = [{"role": "user", "content": "Hello"}]
         result = agent.chat_completion(messages)
@@ -239,21 +353,16 @@ class TestAgentChatCompletion:
             timeout=30,
         )
 
-    @patch("python_agent.agent.litellm.completion")
     def test_chat_completion_with_none_content(self, mock_completion, agent):
         """Test chat completion when response content is None."""
         # Mock response with None content
-        mock_response = Mock()
-        mock_response.choices = [Mock()]
-        mock_response.choices[0].message.content = None
-        mock_completion.return_value = mock_response
+        mock_completion.return_value = completion_response(None)
 
         messages = [{"role": "user", "content": "Hello"}]
         result = agent.chat_completion(messages)
 
         assert result == ""
 
-    @patch("python_agent.agent.litellm.completion")
     def test_chat_completion_api_error(self, mock_completion, agent):
         """Test chat completion when API call fails."""
         mock_completion.side_effect = Exception("API Error")
@@ -263,6 +372,585 @@ class TestAgentChatCompletion:
         with pytest.raises(ModelError, match="Model API call failed: API Error"):
             agent.chat_completion(messages)
 
+    def test_chat_completion_uses_replaced_config(self, mock_completion, agent):
+        """Test assigning a new config updates the completion arguments."""
+        mock_completion.return_value = completion_response("ok")
+
+        agent.config = replace(agent.config, model="other-model", max_tokens=5)
+        agent.chat_completion([{"role": "user", "content": "Hello"}])
+
+        assert mock_completion.call_args.kwargs["model"] == "other-model"
+        assert mock_completion.call_args.kwargs["max_tokens"] == 5
+
+
+class TestAgentResponseCache:
+    """Test suite for the exact-match response cache."""
+
+    @patch("python_agent.agent.litellm.completion")
+    def test_deterministic_requests_are_cached(self, mock_completion):
+        """Test temperature 0 requests hit the cache on repeat."""
+        agent = Agent(
+            {"model": "test", "max_tokens": 100, "temperature": 0, "timeout": 30}
+        )
+        mock_completion.return_value = completion_response("Cached answer")
+        messages = [{"role": "user", "content": "Hello"}]
+
+        first = agent.chat_completion(messages)
+        second = agent.chat_completion([dict(m) for m in messages])
+
+        assert first == second == "Cached answer"
+        mock_completion.assert_called_once()
+
+    @patch("python_agent.agent.litellm.completion")
+    def test_sampled_requests_are_not_cached_by_default(self, mock_completion):
+        """Test non-zero temperature skips the cache unless forced."""
+        agent = Agent(BASE_CONFIG)
+        mock_completion.return_value = completion_response("Fresh answer")
+        messages = [{"role": "user", "content": "Hello"}]
+
+        agent.chat_completion(messages)
+        agent.chat_completion(messages)
+
+        assert mock_completion.call_count == 2
+
+    @patch("python_agent.agent.litellm.completion")
+    def test_cache_flag_forces_caching(self, mock_completion):
+        """Test the cache option enables caching at any temperature."""
+        agent = Agent(
+            {
+                "model": "test",
+                "max_tokens": 100,
+                "temperature": 0.7,
+                "timeout": 30,
+                "cache": True,
+            }
+        )
+        mock_completion.return_value = completion_response("Answer")
+        messages = [{"role": "user", "content": "Hello"}]
+
+        agent.chat_completion(messages)
+        agent.chat_completion(messages)
+
+        mock_completion.assert_called_once()
+
+    @patch("python_agent.agent.litellm.completion")
+    def test_cache_evicts_least_recently_used(self, mock_completion):
+        """Test the cache is bounded by RESPONSE_CACHE_SIZE."""
+        agent = Agent(
+            {"model": "test", "max_tokens": 100, "temperature": 0, "timeout": 30}
+        )
+        mock_completion.return_value = completion_response("Answer")
+
+        with patch("python_agent.agent.RESPONSE_CACHE_SIZE", 2):
+            for prompt in ("a", "b", "c"):
+                agent.chat_completion([{"role": "user", "content": prompt}])
+            agent.chat_completion([{"role": "user", "content": "a"}])
+
+        assert len(agent._response_cache) == 2
+        assert mock_completion.call_count == 4
+
+
+class TestAgentSemanticCache:
+    """Test suite for semantic cache integration in chat completion."""
+
+    @patch("python_agent.agent.litellm.completion")
+    def test_semantic_cache_hit_skips_model_call(self, mock_completion):
+        """Test a semantic cache hit returns without calling the model."""
+        agent = Agent(BASE_CONFIG)
+        agent.semantic_cache = Mock()
+        agent.semantic_cache.lookup.return_value = "Cached by meaning"
+
+        result = agent.chat_completion([{"role": "user", "content": "show files"}])
+
+        assert result == "Cached by meaning"
+        mock_completion.assert_not_called()
+
+    @patch("python_agent.agent.litellm.completion")
+    def test_semantic_cache_miss_stores_response(self, mock_completion):
+        """Test a semantic cache miss stores the model response."""
+        agent = Agent(BASE_CONFIG)
+        agent.semantic_cache = Mock()
+        agent.semantic_cache.lookup.return_value = None
+        mock_completion.return_value = completion_response("Fresh")
+
+        agent.chat_completion([{"role": "user", "content": "list files"}])
+
+        agent.semantic_cache.add.assert_called_once_with("list files", "Fresh", ANY)
+
+    @patch("python_agent.agent.litellm.completion")
+    def test_semantic_cache_misses_after_model_change(self, mock_completion):
+        """Test answers cached under one model are not served for another."""
+        agent = Agent(BASE_CONFIG)
+        agent.semantic_cache = SemanticCache(encoder=lambda text: [1.0])
+        mock_completion.side_effect = [
+            completion_response("From test"),
+            completion_response("From other"),
+        ]
+        messages = [{"role": "user", "content": "list files"}]
+
+        agent.chat_completion(messages)
+        agent.config = replace(agent.config, model="other")
+        result = agent.chat_completion(messages)
+
+        assert result == "From other"
+        assert mock_completion.call_count == 2
+
+    @patch("python_agent.agent.litellm.completion")
+    def test_semantic_cache_skipped_for_multi_turn_conversation(self, mock_completion):
+        """Test a repeated follow-up in a conversation still calls the model."""
+        agent = Agent(BASE_CONFIG)
+        agent.semantic_cache = SemanticCache(encoder=lambda text: [float(len(text))])
+        agent.semantic_cache.add("yes", "Deleted build/")
+        mock_completion.return_value = completion_response("Not wiping home")
+        messages = [
+            {"role": "user", "content": "should I wipe home?"},
+            {"role": "assistant", "content": "Are you sure?"},
+            {"role": "user", "content": "yes"},
+        ]
+
+        result = agent.chat_completion(messages)
+
+        assert result == "Not wiping home"
+        mock_completion.assert_called_once()
+        assert len(agent.semantic_cache) == 1
+
+    def test_semantic_cache_disabled_by_default(self):
+        """Test semantic cache is only created when configured."""
+        agent = Agent(BASE_CONFIG)
+
+        assert agent.semantic_cache is None
+
+
+class TestAgentPromptCaching:
+    """Test suite for Agent._mark_cacheable prompt-caching markers."""
+
+    def _agent(self, model):
+        return Agent(
+            {"model": model, "max_tokens": 100, "temperature": 0.7, "timeout": 30}
+        )
+
+    def test_marks_system_and_last_message_for_claude(self):
+        """Test Claude models get cache_control on system and last message."""
+        agent = self._agent("claude-3-5-haiku-latest")
+        messages = [
+            {"role": "system", "content": "You are helpful."},
+            {"role": "user", "content": "Hi"},
+            {"role": "assistant", "content": "Hello"},
+            {"role": "user", "content": "Again"},
+        ]
+
+        marked = agent._mark_cacheable(messages)
+
+        cache_control = {"type": "ephemeral"}
+        assert marked[0]["content"] == [
+            {"type": "text", "text": "You are helpful.", "cache_control": cache_control}
+        ]
+        assert marked[3]["content"][0]["cache_control"] == cache_control
+        assert marked[1] == messages[1]
+        assert messages[0]["content"] == "You are helpful."
+
+    def test_unsupported_model_messages_unchanged(self):
+        """Test models without prompt caching receive messages untouched."""
+        agent = self._agent("gpt-3.5-turbo")
+        messages = [{"role": "user", "content": "Hi"}]
+
+        assert agent._mark_cacheable(messages) is messages
+
+
+class TestAgentAsyncChatCompletion:
+    """Test suite for Agent.achat_completion method."""
+
+    @pytest.fixture
+    def agent(self):
+        """Create Agent instance for testing."""
+        config = {
+            "model": "gpt-3.5-turbo",
+            "max_tokens": 100,
+            "temperature": 0.7,
+            "timeout": 30,
+        }
+        return Agent(config)
+
+    @patch("python_agent.agent.litellm.acompletion", new_callable=AsyncMock)
+    def test_achat_completion_success(self, mock_acompletion, agent):
+        """Test successful async chat completion."""
+        mock_acompletion.return_value = completion_response("Async response")
+
+        messages = [{"role": "user", "content": "Hello"}]
+        result = asyncio.run(agent.achat_completion(messages))
+
+        assert result == "Async response"
+        mock_acompletion.assert_awaited_once_with(
+            model="gpt-3.5-turbo",
+            messages=messages,
+            max_tokens=100,
+            temperature=0.7,
+            timeout=30,
+        )
+
+    @patch("python_agent.agent.litellm.acompletion", new_callable=AsyncMock)
+    def test_achat_completion_api_error(self, mock_acompletion, agent):
+        """Test async chat completion when API call fails."""
+        mock_acompletion.side_effect = Exception("API Error")
+
+        with pytest.raises(ModelError, match="Model API call failed: API Error"):
+            asyncio.run(agent.achat_completion([{"role": "user", "content": "Hi"}]))
+
+    def test_aprocess_single_prompt(self, agent):
+        """Test processing single prompt asynchronously."""
+        with patch.object(
+            agent, "achat_completion", new_callable=AsyncMock
+        ) as mock_chat:
+            mock_chat.return_value = "Async reply"
+
+            result = asyncio.run(agent.aprocess_single_prompt("Test prompt"))
+
+            assert result == "Async reply"
+            assert agent.conversation_history == [
+                {"role": "user", "content": "Test prompt"},
+                {"role": "assistant", "content": "Async reply"},
+            ]
+
+
+class TestAgentHttpClients:
+    """Test suite for pooled HTTP clients shared across model calls."""
+
+    @pytest.fixture
+    def agent(self):
+        """Create Agent and restore litellm's global sessions afterwards."""
+        import litellm
+
+        with (
+            patch.object(litellm, "client_session", None),
+            patch.object(litellm, "aclient_session", None),
+        ):
+            agent = Agent(BASE_CONFIG)
+            yield agent
+            agent.close()
+
+    @patch("python_agent.agent.litellm.completion")
+    def test_sync_calls_share_one_client(self, mock_completion, agent):
+        """Test consecutive completions reuse the same pooled client."""
+        import litellm
+
+        mock_completion.return_value = completion_response("ok")
+
+        agent.chat_completion([{"role": "user", "content": "a"}])
+        first = litellm.client_session
+        agent.chat_completion([{"role": "user", "content": "b"}])
+
+        assert first is agent._http
+        assert litellm.client_session is first
+        assert first.timeout.read == 30
+
+    def test_close_closes_sync_client(self, agent):
+        """Test close releases the pooled sync client."""
+        import litellm
+
+        agent._model_api()
+        client = agent._http
+
+        agent.close()
+
+        assert client.is_closed
+        assert agent._http is None
+        assert litellm.client_session is None
+
+    def test_close_keeps_client_installed_by_another_agent(self, agent):
+        """Test close leaves litellm's global alone once it was replaced."""
+        import litellm
+
+        other = Agent(BASE_CONFIG)
+        agent._model_api()
+        other._model_api()
+
+        agent.close()
+
+        assert litellm.client_session is other._http
+        other.close()
+
+    @patch("python_agent.agent.litellm.acompletion", new_callable=AsyncMock)
+    def test_async_client_reused_and_closed(self, mock_acompletion, agent):
+        """Test async completions share a client that aclose releases."""
+        import litellm
+
+        mock_acompletion.return_value = completion_response("ok")
+
+        async def run():
+            await agent.achat_completion([{"role": "user", "content": "a"}])
+            client = litellm.aclient_session
+            await agent.achat_completion([{"role": "user", "content": "b"}])
+            assert litellm.aclient_session is client
+            await agent.aclose()
+            return client
+
+        client = asyncio.run(run())
+
+        assert client.is_closed
+        assert agent._async_http is None
+        assert litellm.aclient_session is None
+
+
+class TestAgentProcessBatch:
+    """Test suite for Agent.aprocess_batch method."""
+
+    @pytest.fixture
+    def agent(self):
+        """Create Agent instance for testing."""
+        return Agent(BASE_CONFIG)
+
+    def test_aprocess_batch_preserves_order(self, agent):
+        """Test batch responses are returned in prompt order."""
+
+        async def fake_chat(messages):
+            prompt = messages[0]["content"]
+            await asyncio.sleep(0.01 if prompt == "first" else 0)
+            return f"reply to {prompt}"
+
+        with patch.object(agent, "achat_completion", side_effect=fake_chat):
+            result = asyncio.run(agent.aprocess_batch(["first", "second"]))
+
+        assert result == ["reply to first", "reply to second"]
+        assert agent.conversation_history == []
+
+    def test_aprocess_batch_respects_max_concurrency(self, agent):
+        """Test no more than max_concurrency requests run at once."""
+        in_flight = 0
+        peak = 0
+
+        async def fake_chat(messages):
+            nonlocal in_flight, peak
+            in_flight += 1
+            peak = max(peak, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return "ok"
+
+        with patch.object(agent, "achat_completion", side_effect=fake_chat):
+            result = asyncio.run(agent.aprocess_batch(["p"] * 6, max_concurrency=2))
+
+        assert result == ["ok"] * 6
+        assert peak == 2
+
+    def test_aprocess_batch_reports_failed_prompt(self, agent):
+        """Test one failing prompt yields an error entry, not a failed batch."""
+
+        async def fake_chat(messages):
+            prompt = messages[0]["content"]
+            if prompt == "bad":
+                raise ModelError("Model API call failed: boom")
+            return f"reply to {prompt}"
+
+        with patch.object(agent, "achat_completion", side_effect=fake_chat):
+            result = asyncio.run(agent.aprocess_batch(["first", "bad", "last"]))
+
+        assert result == [
+            "reply to first",
+            "Error: Model API call failed: boom",
+            "reply to last",
+        ]
+
+
+class TestAgentCompactHistory:
+    """Test suite for Agent conversation history compaction."""
+
+    @pytest.fixture
+    def agent(self):
+        """Create Agent with a conversation longer than the verbatim tail."""
+        agent = Agent(BASE_CONFIG)
+        agent.conversation_history = [{"role": "system", "content": "Be brief."}]
+        for i in range(5):
+            agent.conversation_history.append({"role": "user", "content": f"q{i}"})
+            agent.conversation_history.append({"role": "assistant", "content": f"a{i}"})
+        return agent
+
+    @patch("python_agent.agent.litellm.completion")
+    @patch("python_agent.agent.litellm.token_counter", return_value=10)
+    def test_under_budget_leaves_history_unchanged(
+        self, mock_counter, mock_completion, agent
+    ):
+        """Test history within budget is not summarized."""
+        before = list(agent.conversation_history)
+
+        agent._compact_history(1000)
+
+        assert agent.conversation_history == before
+        mock_completion.assert_not_called()
+
+    @patch("python_agent.agent.litellm.completion")
+    @patch("python_agent.agent.litellm.token_counter", return_value=5000)
+    def test_over_budget_summarizes_older_turns(
+        self, mock_counter, mock_completion, agent
+    ):
+        """Test older turns collapse into a summary behind the stable prefix."""
+        mock_completion.return_value = completion_response("talked")
+
+        agent._compact_history(1000)
+
+        history = agent.conversation_history
+        assert history[0] == {"role": "system", "content": "Be brief."}
+        assert history[1] == {"role": "system", "content": "Summary: talked"}
+        assert history[2:] == [
+            {"role": "user", "content": "q2"},
+            {"role": "assistant", "content": "a2"},
+            {"role": "user", "content": "q3"},
+            {"role": "assistant", "content": "a3"},
+            {"role": "user", "content": "q4"},
+            {"role": "assistant", "content": "a4"},
+        ]
+        transcript = mock_completion.call_args.kwargs["messages"][1]["content"]
+        assert transcript == "user: q0\nassistant: a0\nuser: q1\nassistant: a1"
+
+    @patch("python_agent.agent.litellm.completion")
+    @patch("python_agent.agent.litellm.token_counter", return_value=5000)
+    def test_uses_summary_model(self, mock_counter, mock_completion, agent):
+        """Test summary request goes to the configured summary model."""
+        agent.config = replace(agent.config, summary_model="cheap-model")
+        mock_completion.return_value = completion_response("talked")
+
+        agent._compact_history(1000)
+
+        assert mock_completion.call_args.kwargs["model"] == "cheap-model"
+
+    @patch("python_agent.agent.litellm.completion")
+    @patch("python_agent.agent.litellm.token_counter", return_value=5000)
+    def test_summary_failure_raises_model_error(
+        self, mock_counter, mock_completion, agent
+    ):
+        """Test failed summary request raises ModelError."""
+        mock_completion.side_effect = Exception("API failed")
+
+        with pytest.raises(ModelError, match="History summary failed"):
+            agent._compact_history(1000)
+
+    @patch("python_agent.agent.litellm.completion")
+    def test_chat_completion_compacts_only_conversation_history(
+        self, mock_completion, agent
+    ):
+        """Test chat_completion compacts history but not ad-hoc message lists."""
+        agent.config = replace(agent.config, max_input_tokens=2000)
+        mock_completion.return_value = completion_response("ok")
+
+        with patch.object(agent, "_compact_history") as mock_compact:
+            agent.chat_completion(agent.conversation_history)
+            agent.chat_completion([{"role": "user", "content": "Hi"}])
+
+        mock_compact.assert_called_once_with(2000)
+
+    @patch("python_agent.agent.litellm.completion")
+    def test_cache_hit_skips_compaction(self, mock_completion, agent):
+        """Test a cached response is returned before history is compacted."""
+        agent.config = replace(agent.config, temperature=0)
+        mock_completion.return_value = completion_response("ok")
+
+        with patch.object(agent, "_compact_history") as mock_compact:
+            agent.chat_completion(agent.conversation_history)
+            result = agent.chat_completion(agent.conversation_history)
+
+        assert result == "ok"
+        mock_completion.assert_called_once()
+        mock_compact.assert_called_once()
+
+    @patch("python_agent.agent.litellm.token_counter", return_value=10)
+    def test_token_count_covers_only_new_messages(self, mock_counter, agent):
+        """Test each check tokenizes only messages added since the last one."""
+        agent._compact_history(1000)
+        agent.add_message("user", "q5")
+        agent._compact_history(1000)
+
+        assert mock_counter.call_count == 2
+        assert mock_counter.call_args.kwargs["messages"] == [
+            {"role": "user", "content": "q5"}
+        ]
+        assert agent._history_tokens() == 20
+
+    @patch("python_agent.agent.litellm.completion")
+    @patch("python_agent.agent.litellm.acompletion", new_callable=AsyncMock)
+    @patch("python_agent.agent.litellm.token_counter", return_value=5000)
+    def test_achat_completion_summarizes_without_blocking(
+        self, mock_counter, mock_acompletion, mock_completion, agent
+    ):
+        """Test async completion awaits the summary instead of blocking."""
+        mock_acompletion.side_effect = [
+            completion_response("talked"),
+            completion_response("ok"),
+        ]
+
+        result = asyncio.run(agent.achat_completion(agent.conversation_history))
+
+        assert result == "ok"
+        assert agent.conversation_history[1] == {
+            "role": "system",
+            "content": "Summary: talked",
+        }
+        assert mock_acompletion.await_count == 2
+        mock_completion.assert_not_called()
+
+
+class TestAgentRunToolCalls:
+    """Test suite for Agent.run_tool_calls method."""
+
+    @pytest.fixture
+    def agent(self):
+        """Create Agent instance for testing."""
+        return Agent(BASE_CONFIG)
+
+    def test_independent_calls_run_concurrently(self, agent):
+        """Test calls without dependencies execute at the same time."""
+        barrier = threading.Barrier(2, timeout=5)
+
+        def execute(command):
+            barrier.wait()
+            return {"success": True, "output": command}
+
+        with patch.object(agent.bash_tool, "execute_command", side_effect=execute):
+            results = asyncio.run(
+                agent.run_tool_calls([{"command": "ls"}, {"command": "pwd"}])
+            )
+
+        assert [r["output"] for r in results] == ["ls", "pwd"]
+
+    def test_dependent_call_waits_for_dependency(self, agent):
+        """Test a call runs only after the calls it depends on."""
+        order = []
+
+        def execute(command):
+            order.append(command)
+            return {"success": True, "output": command}
+
+        calls = [
+            {"id": "a", "command": "make out"},
+            {"id": "b", "command": "cat out", "depends_on": ["a"]},
+        ]
+
+        with patch.object(agent.bash_tool, "execute_command", side_effect=execute):
+            results = asyncio.run(agent.run_tool_calls(calls))
+
+        assert order == ["make out", "cat out"]
+        assert [r["output"] for r in results] == ["make out", "cat out"]
+
+    def test_invalid_dependency_raises_error(self, agent):
+        """Test dependency on an unknown call raises AgentError."""
+        calls = [{"id": "a", "command": "ls", "depends_on": ["missing"]}]
+
+        with pytest.raises(AgentError, match="invalid dependency: missing"):
+            asyncio.run(agent.run_tool_calls(calls))
+
+    def test_confirmation_runs_calls_sequentially(self, agent):
+        """Test calls are not run in threads when confirmation is required."""
+        agent.bash_tool.confirmation_required = True
+
+        with (
+            patch.object(
+                agent.bash_tool, "execute_command", return_value={"success": True}
+            ) as mock_execute,
+            patch("python_agent.agent.asyncio.to_thread") as mock_to_thread,
+        ):
+            asyncio.run(agent.run_tool_calls([{"command": "ls"}, {"command": "pwd"}]))
+
+        assert mock_execute.call_count == 2
+        mock_to_thread.assert_not_called()
+
 
 class TestAgentProcessSinglePrompt:
     """Test suite for Agent.process_single_prompt method."""
@@ -270,8 +958,7 @@ class TestAgentProcessSinglePrompt:
     @pytest.fixture
     def agent(self):
         """Create Agent instance for testing."""
-        config = {"model": "test", "max_tokens": 100, "temperature": 0.7, "timeout": 30}
-        return Agent(config)
+        return Agent(BASE_CONFIG)
 
     def test_process_single_prompt(self, agent):
         """Test processing single prompt."""
@@ -303,184 +990,403 @@ class TestAgentInteractiveLoop:
             "max_tokens": 100,
             "temperature": 0.7,
             "timeout": 30,
+            "stream": False,
             "verbose": False,
             "quiet": False,
         }
-        return Agent(config)
-
-    @patch("builtins.input")
-    @patch("builtins.print")
-    def test_interactive_loop_exit_command(self, mock_print, mock_input, agent):
-        """Test interactive loop with exit command."""
-        mock_input.return_value = "exit"
+        agent = Agent(config)
+        agent.session_manager.schedule_save = Mock()
+        return agent
 
+    @pytest.fixture(scope="class")
+    def io_mocks(self):
+        """Patch input and print once for the whole class."""
         with (
-            patch.object(agent, "start_new_session") as mock_start,
-            patch.object(agent, "save_current_session") as mock_save,
+            patch("builtins.input") as mock_input,
+            patch("builtins.print") as mock_print,
         ):
-                mock_session = Mock()
-                mock_session.session_id = "test-session"
+            yield mock_input, mock_print
 
-                agent.interactive_loop()
+    @pytest.fixture
+    def console(self, io_mocks):
+        """Hand each test the class-wide input and print mocks, freshly reset."""
+        for mock in io_mocks:
+            mock.reset_mock(return_value=True, side_effect=True)
+        return io_mocks
 
-                # start_new_session should be called because current_session is None
-                mock_start.assert_called_once()
-                mock_save.assert_called_once()
+    @pytest.fixture
+    def patched_agent(self, agent):
+        """Patch the agent's session and model methods in one exit stack."""
+        with contextlib.ExitStack() as stack:
+            mocks = {
+                name: stack.enter_context(patch.object(agent, name))
+                for name in (
+                    "start_new_session",
+                    "save_current_session",
+                    "chat_completion",
+                    "add_message",
+                )
+            }
+            yield agent, mocks
+
+    def test_interactive_loop_exit_command(self, console, patched_agent):
+        """Test interactive loop with exit command."""
+        mock_input, _ = console
+        agent, mocks = patched_agent
+        mock_input.return_value = "exit"
 
-    @patch("builtins.input")
-    @patch("builtins.print")
-    def test_interactive_loop_with_conversation(self, mock_print, mock_input, agent):
-        """Test interactive loop with user input and response."""
-        mock_input.side_effect = ["Hello", "exit"]
+        agent.interactive_loop()
 
-        with (
-            patch.object(agent, "start_new_session"),
-            patch.object(agent, "save_current_session"),
-            patch.object(agent, "chat_completion") as mock_chat,
-            patch.object(agent, "add_message") as mock_add,
-        ):
-                        mock_chat.return_value = "Hi there!"
-                        mock_session = Mock()
-                        mock_session.session_id = "test-session"
-                        agent.current_session = mock_session
+        # start_new_session should be called because current_session is None
+        mocks["start_new_session"].assert_called_once()
+        mocks["save_current_session"].assert_called_once()
 
-                        agent.interactive_loop()
+    @pytest.mark.parametrize("command", ["EXIT", "Quit", " bye "])
+    def test_interactive_loop_exit_words_ignore_case(
+        self, console, patched_agent, command
+    ):
+        """Test exit words match regardless of case and surrounding spaces."""
+        mock_input, _ = console
+        agent, mocks = patched_agent
+        mock_input.return_value = command
 
-                        # Verify user message was added
-                        mock_add.assert_any_call("user", "Hello")
-                        # Verify assistant response was added
-                        mock_add.assert_any_call("assistant", "Hi there!")
-                        # Verify chat completion was called
-                        mock_chat.assert_called_once()
+        agent.interactive_loop()
 
-    @patch("builtins.input")
-    @patch("builtins.print")
-    def test_interactive_loop_with_empty_input(self, mock_print, mock_input, agent):
+        mocks["save_current_session"].assert_called_once()
+        mocks["chat_completion"].assert_not_called()
+
+    def test_interactive_loop_with_conversation(self, console, patched_agent):
+        """Test interactive loop with user input and response."""
+        mock_input, _ = console
+        agent, mocks = patched_agent
+        mock_input.side_effect = HELLO_THEN_EXIT
+        mocks["chat_completion"].return_value = "Hi there!"
+        agent.current_session = session_stub()
+
+        agent.interactive_loop()
+
+        # Verify user message was added
+        mocks["add_message"].assert_any_call("user", "Hello")
+        # Verify assistant response was added
+        mocks["add_message"].assert_any_call("assistant", "Hi there!")
+        # Verify chat completion was called
+        mocks["chat_completion"].assert_called_once()
+
+    def test_interactive_loop_with_empty_input(self, console, patched_agent):
         """Test interactive loop with empty input."""
+        mock_input, _ = console
+        agent, mocks = patched_agent
         mock_input.side_effect = ["", "  ", "exit"]
+        agent.current_session = session_stub()
+
+        agent.interactive_loop()
+
+        # Verify chat completion was not called for empty inputs
+        mocks["chat_completion"].assert_not_called()
+
+    def test_interactive_loop_keyboard_interrupt(self, console, patched_agent):
+        """Test interactive loop handles KeyboardInterrupt."""
+        mock_input, _ = console
+        agent, mocks = patched_agent
+        mock_input.side_effect = KeyboardInterrupt
+        agent.current_session = session_stub()
+
+        agent.interactive_loop()
+
+        mocks["save_current_session"].assert_called()
+
+    @pytest.mark.parametrize(
+        "error,expected",
+        [
+            (ModelError("API failed"), "Error: API failed"),
+            (RuntimeError("Unexpected error"), "Unexpected error: Unexpected error"),
+        ],
+        ids=["model_error", "unexpected_error"],
+    )
+    def test_interactive_loop_chat_errors(
+        self, console, patched_agent, error, expected
+    ):
+        """Test interactive loop prints model and unexpected chat errors."""
+        mock_input, mock_print = console
+        agent, mocks = patched_agent
+        mock_input.side_effect = HELLO_THEN_EXIT
+        mocks["chat_completion"].side_effect = error
+        agent.current_session = session_stub()
+
+        agent.interactive_loop()
+
+        # Verify error message was printed
+        mock_print.assert_any_call(expected)
+
+    def test_interactive_loop_verbose_mode(self, console, patched_agent):
+        """Test interactive loop with verbose mode enabled."""
+        mock_input, mock_print = console
+        agent, mocks = patched_agent
+        agent.config = replace(agent.config, verbose=True)
+        mock_input.side_effect = HELLO_THEN_EXIT
+        mocks["chat_completion"].return_value = "Response"
+        mock_session = session_stub()
+
+        # Mock start_new_session to set the current_session
+        def set_session():
+            agent.current_session = mock_session
+
+        mocks["start_new_session"].side_effect = set_session
+
+        agent.interactive_loop()
+
+        # Verify verbose messages were printed
+        mock_print.assert_any_call("Started session: test-session")
+        mock_print.assert_any_call("Agent: Thinking...")
+
+    def test_interactive_loop_quiet_mode(self, console, patched_agent):
+        """Test interactive loop with quiet mode enabled."""
+        mock_input, mock_print = console
+        agent, _ = patched_agent
+        agent.config = replace(agent.config, quiet=True)
+        mock_input.return_value = "exit"
+        agent.current_session = session_stub()
+
+        agent.interactive_loop()
+
+        # Verify greeting message was not printed
+        greeting = ("AI Coding Agent (type 'exit' to quit)",)
+        assert not any(c.args[:1] == greeting for c in mock_print.call_args_list)
+
+    def test_interactive_loop_schedules_session_saves(self, console, agent):
+        """Test turns are saved in the background and flushed on exit."""
+        mock_input, _ = console
+        mock_input.side_effect = [f"q{i}" for i in range(3)] + ["exit"]
 
         with (
             patch.object(agent, "start_new_session"),
-            patch.object(agent, "save_current_session"),
-            patch.object(agent, "chat_completion") as mock_chat,
+            patch.object(agent.session_manager, "schedule_save") as mock_schedule,
+            patch.object(agent.session_manager, "save_session") as mock_save,
+            patch.object(agent, "chat_completion", return_value="ok"),
         ):
-                    mock_session = Mock()
-                    mock_session.session_id = "test-session"
-                    agent.current_session = mock_session
+            agent.current_session = session_stub()
 
-                    agent.interactive_loop()
+            agent.interactive_loop()
 
-                    # Verify chat completion was not called for empty inputs
-                    mock_chat.assert_not_called()
+        assert mock_schedule.call_count == 6
+        mock_save.assert_called_once_with(agent.current_session)
 
-    @patch("builtins.input")
-    @patch("builtins.print")
-    def test_interactive_loop_keyboard_interrupt(self, mock_print, mock_input, agent):
-        """Test interactive loop handles KeyboardInterrupt."""
-        mock_input.side_effect = KeyboardInterrupt()
+    def test_interactive_loop_model_error_flushes_session(self, console, agent):
+        """Test pending turns are saved when a model error occurs."""
+        mock_input, _ = console
+        mock_input.side_effect = HELLO_THEN_EXIT
 
         with (
             patch.object(agent, "start_new_session"),
             patch.object(agent, "save_current_session") as mock_save,
+            patch.object(agent, "chat_completion", side_effect=ModelError("boom")),
         ):
-                mock_session = Mock()
-                mock_session.session_id = "test-session"
-                agent.current_session = mock_session
+            agent.current_session = session_stub()
 
-                agent.interactive_loop()
+            agent.interactive_loop()
 
-                mock_save.assert_called()
+        assert mock_save.call_count == 2
 
-    @patch("builtins.input")
-    @patch("builtins.print")
-    def test_interactive_loop_model_error(self, mock_print, mock_input, agent):
-        """Test interactive loop handles ModelError."""
-        mock_input.side_effect = ["Hello", "exit"]
 
-        with (
-            patch.object(agent, "start_new_session"),
-            patch.object(agent, "save_current_session"),
-            patch.object(agent, "chat_completion") as mock_chat,
-        ):
-                    mock_chat.side_effect = ModelError("API failed")
-                    mock_session = Mock()
-                    mock_session.session_id = "test-session"
-                    agent.current_session = mock_session
+def _stream_chunks(*tokens):
+    """Build mock streaming chunks carrying the given delta tokens."""
+    chunks = []
+    for token in tokens:
+        chunk = Mock()
+        chunk.choices = [Mock()]
+        chunk.choices[0].delta.content = token
+        chunks.append(chunk)
+    return chunks
+
+
+class TestWriteStream:
+    """Test suite for write_stream output coalescing."""
+
+    @patch("python_agent.agent.time.monotonic", return_value=0.0)
+    def test_flushes_on_line_breaks_and_at_end(self, mock_monotonic):
+        """Test tokens without newlines are not flushed individually."""
+        out = Mock()
+        chunks = []
+
+        write_stream(["a", "b\n", "c", "d"], out, chunks)
+
+        assert chunks == ["a", "b\n", "c", "d"]
+        assert [c.args[0] for c in out.write.call_args_list] == chunks
+        assert out.flush.call_count == 2
+
+    @patch("python_agent.agent.time.monotonic", side_effect=itertools.count(0, 0.1))
+    def test_flushes_when_interval_elapses(self, mock_monotonic):
+        """Test slow streams still flush so text appears live."""
+        out = Mock()
+
+        write_stream(["a", "b", "c"], out, [])
+
+        assert out.flush.call_count == 4
+
+    def test_keeps_partial_chunks_on_interrupt(self):
+        """Test tokens written before an interrupt are kept and flushed."""
+        out = Mock()
+        chunks = []
+
+        def tokens():
+            yield "partial"
+            raise KeyboardInterrupt
+
+        with pytest.raises(KeyboardInterrupt):
+            write_stream(tokens(), out, chunks)
+
+        assert chunks == ["partial"]
+        out.flush.assert_called()
+
+    def test_writes_prefix_only_once_tokens_arrive(self):
+        """Test the prefix is held back until the first token."""
+        out = Mock()
+
+        def failing():
+            raise ModelError("boom")
+            yield
+
+        with pytest.raises(ModelError):
+            write_stream(failing(), out, [], prefix="Agent: ")
+        out.write.assert_not_called()
+
+        write_stream(["a", "b"], out, [], prefix="Agent: ")
+        assert [c.args[0] for c in out.write.call_args_list] == ["Agent: ", "a", "b"]
 
-                    agent.interactive_loop()
 
-                    # Verify error message was printed
-                    mock_print.assert_any_call("Error: API failed")
+class TestAgentStreaming:
+    """Test suite for Agent streaming output."""
+
+    @pytest.fixture
+    def agent(self):
+        """Create Agent instance for testing."""
+        config = {
+            "model": "test",
+            "max_tokens": 100,
+            "temperature": 0.7,
+            "timeout": 30,
+            "verbose": False,
+            "quiet": False,
+        }
+        agent = Agent(config)
+        agent.session_manager.schedule_save = Mock()
+        return agent
+
+    @patch("python_agent.agent.litellm.completion")
+    def test_stream_chat_yields_tokens(self, mock_completion, agent):
+        """Test stream_chat yields non-empty deltas in order."""
+        mock_completion.return_value = iter(_stream_chunks("Hel", None, "lo", ""))
+
+        tokens = list(agent.stream_chat([{"role": "user", "content": "Hi"}]))
+
+        assert tokens == ["Hel", "lo"]
+        assert mock_completion.call_args.kwargs["stream"] is True
+
+    @patch("python_agent.agent.litellm.completion")
+    def test_stream_chat_raises_model_error(self, mock_completion, agent):
+        """Test stream_chat wraps API failures in ModelError."""
+        mock_completion.side_effect = Exception("API failed")
+
+        with pytest.raises(ModelError, match="Model API call failed"):
+            list(agent.stream_chat([{"role": "user", "content": "Hi"}]))
+
+    @patch("python_agent.agent.litellm.completion")
+    def test_stream_chat_uses_response_cache(self, mock_completion, agent):
+        """Test streamed response is cached and replayed on repeat."""
+        agent.config = replace(agent.config, cache=True)
+        mock_completion.return_value = iter(_stream_chunks("Hi", " there"))
+        messages = [{"role": "user", "content": "Hello"}]
+
+        list(agent.stream_chat(messages))
+        tokens = list(agent.stream_chat(messages))
+
+        assert tokens == ["Hi there"]
+        mock_completion.assert_called_once()
+
+    @patch("python_agent.agent.litellm.completion")
+    def test_stream_single_prompt_records_history(self, mock_completion, agent):
+        """Test streamed prompt adds user and assembled assistant messages."""
+        mock_completion.return_value = iter(_stream_chunks("Hi", " there"))
+
+        tokens = list(agent.stream_single_prompt("Hello"))
+
+        assert tokens == ["Hi", " there"]
+        assert agent.conversation_history == [
+            {"role": "user", "content": "Hello"},
+            {"role": "assistant", "content": "Hi there"},
+        ]
 
     @patch("builtins.input")
     @patch("builtins.print")
-    def test_interactive_loop_unexpected_error(self, mock_print, mock_input, agent):
-        """Test interactive loop handles unexpected errors."""
-        mock_input.side_effect = ["Hello", "exit"]
+    def test_interactive_loop_streams_to_stdout(
+        self, mock_print, mock_input, agent, capsys
+    ):
+        """Test interactive loop writes tokens to stdout as they arrive."""
+        mock_input.side_effect = HELLO_THEN_EXIT
 
         with (
             patch.object(agent, "start_new_session"),
             patch.object(agent, "save_current_session"),
-            patch.object(agent, "chat_completion") as mock_chat,
+            patch.object(agent, "stream_chat", return_value=iter(["Hi", " there"])),
         ):
-                    mock_chat.side_effect = RuntimeError("Unexpected error")
-                    mock_session = Mock()
-                    mock_session.session_id = "test-session"
-                    agent.current_session = mock_session
+            agent.current_session = session_stub()
 
-                    agent.interactive_loop()
+            agent.interactive_loop()
 
-                    # Verify error message was printed
-                    mock_print.assert_any_call("Unexpected error: Unexpected error")
+        assert "Agent: Hi there\n" in capsys.readouterr().out
+        assert agent.conversation_history[-1] == {
+            "role": "assistant",
+            "content": "Hi there",
+        }
 
     @patch("builtins.input")
     @patch("builtins.print")
-    def test_interactive_loop_verbose_mode(self, mock_print, mock_input, agent):
-        """Test interactive loop with verbose mode enabled."""
-        agent.config["verbose"] = True
-        mock_input.side_effect = ["Hello", "exit"]
+    def test_interactive_loop_stream_error_writes_no_prefix(
+        self, mock_print, mock_input, agent, capsys
+    ):
+        """Test a stream failing before its first token leaves stdout clean."""
+        mock_input.side_effect = HELLO_THEN_EXIT
+
+        def failing(messages):
+            raise ModelError("boom")
+            yield
 
         with (
-            patch.object(agent, "start_new_session") as mock_start,
+            patch.object(agent, "start_new_session"),
             patch.object(agent, "save_current_session"),
-            patch.object(agent, "chat_completion") as mock_chat,
+            patch.object(agent, "stream_chat", side_effect=failing),
         ):
-                    mock_chat.return_value = "Response"
-                    mock_session = Mock()
-                    mock_session.session_id = "test-session"
-
-                    # Mock start_new_session to set the current_session
-                    def set_session():
-                        agent.current_session = mock_session
+            agent.current_session = session_stub()
 
-                    mock_start.side_effect = set_session
+            agent.interactive_loop()
 
-                    agent.interactive_loop()
-
-                    # Verify verbose messages were printed
-                    mock_print.assert_any_call("Started session: test-session")
-                    mock_print.assert_any_call("Agent: Thinking...")
+        assert capsys.readouterr().out == ""
+        mock_print.assert_any_call("Error: boom")
 
     @patch("builtins.input")
     @patch("builtins.print")
-    def test_interactive_loop_quiet_mode(self, mock_print, mock_input, agent):
-        """Test interactive loop with quiet mode enabled."""
-        agent.config["quiet"] = True
-        mock_input.return_value = "exit"
+    def test_interactive_loop_interrupt_keeps_partial_response(
+        self, mock_print, mock_input, agent, capsys
+    ):
+        """Test Ctrl+C mid-stream keeps partial text and continues the loop."""
+        mock_input.side_effect = HELLO_THEN_EXIT
+
+        def interrupted(messages):
+            yield "Partial"
+            raise KeyboardInterrupt
 
         with (
             patch.object(agent, "start_new_session"),
-            patch.object(agent, "save_current_session"),
+            patch.object(agent, "save_current_session") as mock_save,
+            patch.object(agent, "stream_chat", side_effect=interrupted),
         ):
-                mock_session = Mock()
-                mock_session.session_id = "test-session"
-                agent.current_session = mock_session
+            agent.current_session = session_stub()
 
-                agent.interactive_loop()
+            agent.interactive_loop()
 
-                # Verify greeting message was not printed
-                print_calls = [call[0][0] for call in mock_print.call_args_list]
-                assert "AI Coding Agent (type 'exit' to quit)" not in print_calls
+        assert "Partial [interrupted]" in capsys.readouterr().out
+        assert agent.conversation_history[-1]["content"] == "Partial"
+        mock_save.assert_called()
 
 
 @pytest.mark.integration
@@ -489,8 +1395,7 @@ class TestAgentIntegration:
 
     def test_agent_with_real_session_manager(self):
         """Test Agent integration with real SessionManager."""
-        config = {"model": "test", "max_tokens": 100, "temperature": 0.7, "timeout": 30}
-        agent = Agent(config)
+        agent = Agent(BASE_CONFIG)
 
         # Test session creation and management
         agent.start_new_session()
@@ -503,8 +1408,7 @@ class TestAgentIntegration:
 
     def test_agent_session_resume_integration(self):
         """Test Agent session resume integration."""
-        config = {"model": "test", "max_tokens": 100, "temperature": 0.7, "timeout": 30}
-        agent = Agent(config)
+        agent = Agent(BASE_CONFIG)
 
         # Create session with messages
         session = Session("test-session-id")
@@ -3,12 +3,25 @@
 Keywords: test, bash, tool, subprocess, command, execution
 """
 
+import io
+import signal
 import subprocess
+import time
 from unittest.mock import Mock, patch
 
 import pytest
 
-from python_agent.bash_tool import BashTool, BashToolError
+from python_agent.bash_tool import BashTool, BashToolError, _TailBuffer
+
+
+def _popen(returncode: int = 0, stdout: str = "", stderr: str = "") -> Mock:
+    """Build a mock Popen process with in-memory output pipes."""
+    proc = Mock()
+    proc.pid = 12345
+    proc.stdout = io.BytesIO(stdout.encode())
+    proc.stderr = io.BytesIO(stderr.encode())
+    proc.wait.return_value = returncode
+    return proc
 
 
 class TestBashToolInit:
@@ -142,12 +155,9 @@ class TestBashToolExecuteCommand:
     def test_execute_successful_command(self):
         """Test executing successful command returns expected result."""
         tool = BashTool()
-        mock_result = Mock()
-        mock_result.returncode = 0
-        mock_result.stdout = "test output"
-        mock_result.stderr = ""
+        mock_proc = _popen(0, "test output", "")
 
-        with patch("subprocess.run", return_value=mock_result):
+        with patch("subprocess.Popen", return_value=mock_proc):
             result = tool.execute_command("echo test")
 
         assert result["success"] is True
@@ -158,12 +168,9 @@ class TestBashToolExecuteCommand:
     def test_execute_failed_command(self):
         """Test executing failed command returns expected result."""
         tool = BashTool()
-        mock_result = Mock()
-        mock_result.returncode = 1
-        mock_result.stdout = ""
-        mock_result.stderr = "command not found"
+        mock_proc = _popen(1, "", "command not found")
 
-        with patch("subprocess.run", return_value=mock_result):
+        with patch("subprocess.Popen", return_value=mock_proc):
             result = tool.execute_command("invalid_command")
 
         assert result["success"] is False
@@ -175,11 +182,17 @@ class TestBashToolExecuteCommand:
         """Test executing command that times out."""
         tool = BashTool(timeout=5)
 
-        with patch(
-            "subprocess.run", side_effect=subprocess.TimeoutExpired("sleep 10", 5)
+        mock_proc = _popen()
+        mock_proc.wait.side_effect = [subprocess.TimeoutExpired("sleep 10", 5), -9]
+
+        with (
+            patch("subprocess.Popen", return_value=mock_proc),
+            patch("os.killpg") as mock_killpg,
         ):
             result = tool.execute_command("sleep 10")
 
+        mock_killpg.assert_called_once_with(mock_proc.pid, signal.SIGKILL)
+
         assert result["success"] is False
         assert result["output"] == ""
         assert result["error"] == "Command timed out after 5 seconds"
@@ -189,7 +202,7 @@ class TestBashToolExecuteCommand:
         """Test executing command that raises subprocess exception."""
         tool = BashTool()
 
-        with patch("subprocess.run", side_effect=OSError("Process failed")):
+        with patch("subprocess.Popen", side_effect=OSError("Process failed")):
             result = tool.execute_command("echo test")
 
         assert result["success"] is False
@@ -198,31 +211,30 @@ class TestBashToolExecuteCommand:
         assert result["exit_code"] == 1
 
     def test_execute_command_calls_subprocess_with_correct_parameters(self):
-        """Test that subprocess.run is called with correct parameters."""
+        """Test that subprocess.Popen is called with correct parameters."""
         tool = BashTool(timeout=60)
-        mock_result = Mock()
-        mock_result.returncode = 0
-        mock_result.stdout = "output"
-        mock_result.stderr = ""
+        mock_proc = _popen(0, "output", "")
 
-        with patch("subprocess.run", return_value=mock_result) as mock_run:
+        with patch("subprocess.Popen", return_value=mock_proc) as mock_popen:
             tool.execute_command("echo test")
 
-            mock_run.assert_called_once_with(
-                "echo test", shell=True, capture_output=True, text=True, timeout=60
+            mock_popen.assert_called_once_with(
+                ["bash", "-c", "echo test"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                bufsize=65536,
+                start_new_session=True,
             )
+            mock_proc.wait.assert_called_once_with(timeout=60)
 
     def test_execute_command_with_confirmation_accepted(self):
         """Test executing command with confirmation required and accepted."""
         tool = BashTool(confirmation_required=True)
-        mock_result = Mock()
-        mock_result.returncode = 0
-        mock_result.stdout = "test output"
-        mock_result.stderr = ""
+        mock_proc = _popen(0, "test output", "")
 
         with (
             patch("builtins.input", return_value="y"),
-            patch("subprocess.run", return_value=mock_result),
+            patch("subprocess.Popen", return_value=mock_proc),
         ):
             result = tool.execute_command("echo test")
 
@@ -242,6 +254,7 @@ class TestBashToolExecuteCommand:
         assert result["output"] == ""
         assert result["error"] == "Command execution cancelled by user"
         assert result["exit_code"] == 1
+        assert result["truncated"] is False
 
     @pytest.mark.parametrize(
         "command,timeout",
@@ -254,17 +267,63 @@ class TestBashToolExecuteCommand:
     def test_execute_various_commands(self, command, timeout):
         """Test executing various commands with different timeouts."""
         tool = BashTool(timeout=timeout)
-        mock_result = Mock()
-        mock_result.returncode = 0
-        mock_result.stdout = f"output for {command}"
-        mock_result.stderr = ""
+        mock_proc = _popen(0, f"output for {command}", "")
 
-        with patch("subprocess.run", return_value=mock_result):
+        with patch("subprocess.Popen", return_value=mock_proc):
             result = tool.execute_command(command)
 
         assert result["success"] is True
         assert result["output"] == f"output for {command}"
 
+    def test_execute_command_decodes_invalid_utf8(self):
+        """Test undecodable output bytes are replaced instead of failing."""
+        tool = BashTool()
+        mock_proc = _popen()
+        mock_proc.stdout = io.BytesIO(b"ok \xff")
+
+        with patch("subprocess.Popen", return_value=mock_proc):
+            result = tool.execute_command("cat binary")
+
+        assert result["success"] is True
+        assert result["output"] == "ok \ufffd"
+
+    def test_execute_command_truncates_large_output(self):
+        """Test output beyond the cap keeps only the tail and is flagged."""
+        tool = BashTool()
+        mock_proc = _popen(0, "head-" + "x" * 100 + "-tail")
+
+        with (
+            patch("python_agent.bash_tool.MAX_OUTPUT_BYTES", 10),
+            patch("subprocess.Popen", return_value=mock_proc),
+        ):
+            result = tool.execute_command("yes")
+
+        assert result["output"] == "xxxxx-tail"
+        assert result["truncated"] is True
+
+
+class TestTailBuffer:
+    """Test suite for the bounded output buffer."""
+
+    def test_keeps_everything_under_limit(self):
+        """Test writes within the limit are kept intact."""
+        buffer = _TailBuffer(10)
+        buffer.write(b"abc")
+        buffer.write(b"def")
+
+        assert buffer.getvalue() == b"abcdef"
+        assert buffer.truncated is False
+
+    def test_drops_oldest_bytes_over_limit(self):
+        """Test oldest bytes are dropped across chunk boundaries."""
+        buffer = _TailBuffer(5)
+        buffer.write(b"abc")
+        buffer.write(b"def")
+        buffer.write(b"gh")
+
+        assert buffer.getvalue() == b"defgh"
+        assert buffer.truncated is True
+
 
 class TestBashToolErrorHandling:
     """Test suite for BashTool error handling scenarios."""
@@ -284,7 +343,7 @@ class TestBashToolErrorHandling:
         """Test that general exceptions are handled properly."""
         tool = BashTool()
 
-        with patch("subprocess.run", side_effect=RuntimeError("Runtime error")):
+        with patch("subprocess.Popen", side_effect=RuntimeError("Runtime error")):
             result = tool.execute_command("echo test")
 
         assert result["success"] is False
@@ -332,3 +391,82 @@ class TestBashToolIntegration:
         assert result["output"] == ""
         assert "timed out after 1 seconds" in result["error"]
         assert result["exit_code"] == 124
+
+    @pytest.mark.integration
+    def test_background_child_holding_pipes_times_out(self):
+        """Test a background child holding the pipes cannot outlast the timeout."""
+        tool = BashTool(timeout=1)
+
+        start = time.monotonic()
+        result = tool.execute_command("echo hi; sleep 8 &")
+
+        assert time.monotonic() - start < 4
+        assert result["exit_code"] == 124
+        assert "timed out after 1 seconds" in result["error"]
+
+
+class TestBashToolPersistentShell:
+    """Test suite for BashTool running commands in a long-lived shell."""
+
+    @pytest.fixture
+    def tool(self):
+        """Create persistent-shell BashTool and close it afterwards."""
+        tool = BashTool(timeout=5, persistent_shell=True)
+        yield tool
+        tool.close()
+
+    @pytest.mark.integration
+    def test_state_persists_between_commands(self, tool, tmp_path):
+        """Test working directory and variables carry over between calls."""
+        tool.execute_command(f"cd {tmp_path} && export GREETING=hi")
+
+        result = tool.execute_command('pwd; echo "$GREETING"')
+
+        assert result["output"] == f"{tmp_path}\nhi\n"
+        assert result["success"] is True
+
+    @pytest.mark.integration
+    def test_exit_code_and_stderr(self, tool):
+        """Test exit status and stderr without trailing newline are captured."""
+        result = tool.execute_command("printf out; printf err >&2; false")
+
+        assert result["output"] == "out"
+        assert result["error"] == "err"
+        assert result["exit_code"] == 1
+        assert result["success"] is False
+
+    @pytest.mark.integration
+    def test_command_cannot_read_shell_input(self, tool):
+        """Test commands get /dev/null as stdin instead of the shell's pipe."""
+        result = tool.execute_command("cat; echo done")
+
+        assert result["output"] == "done\n"
+
+    @pytest.mark.integration
+    def test_exit_restarts_shell(self, tool):
+        """Test a command that exits the shell reports its code and recovers."""
+        result = tool.execute_command("exit 3")
+
+        assert result["exit_code"] == 3
+        assert tool.execute_command("echo back")["output"] == "back\n"
+
+    @pytest.mark.integration
+    def test_timeout_kills_shell_and_recovers(self):
+        """Test timeout kills the shell and the next call starts a new one."""
+        tool = BashTool(timeout=1, persistent_shell=True)
+        try:
+            result = tool.execute_command("sleep 5")
+
+            assert result["exit_code"] == 124
+            assert "timed out after 1 seconds" in result["error"]
+            assert tool.execute_command("echo ok")["output"] == "ok\n"
+        finally:
+            tool.close()
+
+    def test_close_without_shell_is_noop(self):
+        """Test close does nothing when no shell was started."""
+        tool = BashTool(persistent_shell=True)
+
+        tool.close()
+
+        assert tool._shell is None
@@ -8,7 +8,7 @@ Keywords: CLI, tests, command-line, click, main, entry-point, testing
 
 import tempfile
 from pathlib import Path
-from unittest.mock import MagicMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 from click.testing import CliRunner
 
@@ -50,7 +50,8 @@ class TestCLIMainFunction:
         mock_config = {"tools_enabled": True, "confirmation_required": False}
         mock_load_config.return_value = mock_config
         mock_agent = MagicMock()
-        mock_agent.process_single_prompt.return_value = "Test response"
+        mock_agent.aprocess_single_prompt = AsyncMock(return_value="Test response")
+        mock_agent.aclose = AsyncMock()
         mock_agent_class.return_value = mock_agent
 
         # Run CLI
@@ -58,8 +59,47 @@ class TestCLIMainFunction:
 
         # Verify
         assert result.exit_code == 0
-        mock_agent.process_single_prompt.assert_called_once_with("Test prompt")
+        mock_agent.aprocess_single_prompt.assert_awaited_once_with("Test prompt")
         assert "Agent: Test response" in result.output
+        mock_agent.close.assert_called_once()
+        mock_agent.aclose.assert_awaited_once()
+
+    @patch("python_agent.cli.load_configuration")
+    @patch("python_agent.agent.Agent")
+    def test_main_single_shot_streaming(self, mock_agent_class, mock_load_config):
+        """Test single-shot mode echoes streamed tokens."""
+        mock_load_config.return_value = {"tools_enabled": True}
+        mock_agent = MagicMock()
+        mock_agent.stream_single_prompt.return_value = iter(["Test", " response"])
+        mock_agent_class.return_value = mock_agent
+
+        result = self.runner.invoke(main, ["--prompt", "Test prompt", "--stream"])
+
+        assert result.exit_code == 0
+        mock_agent.stream_single_prompt.assert_called_once_with("Test prompt")
+        assert "Agent: Test response\n" in result.output
+
+    @patch("python_agent.cli.load_configuration")
+    @patch("python_agent.agent.Agent")
+    def test_main_single_shot_streaming_error_leaves_stdout_empty(
+        self, mock_agent_class, mock_load_config
+    ):
+        """Test a stream that fails before any token prints no prefix."""
+        from python_agent.agent import ModelError
+
+        def failing(prompt):
+            raise ModelError("boom")
+            yield
+
+        mock_load_config.return_value = {"tools_enabled": True}
+        mock_agent = MagicMock()
+        mock_agent.stream_single_prompt.side_effect = failing
+        mock_agent_class.return_value = mock_agent
+
+        result = self.runner.invoke(main, ["--prompt", "Test prompt", "--stream"])
+
+        assert result.stdout == ""
+        assert "Agent error: boom" in result.stderr
 
     @patch("python_agent.cli.load_configuration")
     @patch("python_agent.agent.Agent")
@@ -69,7 +109,8 @@ class TestCLIMainFunction:
         mock_config = {"tools_enabled": True, "confirmation_required": False}
         mock_load_config.return_value = mock_config
         mock_agent = MagicMock()
-        mock_agent.process_single_prompt.return_value = "File response"
+        mock_agent.aprocess_single_prompt = AsyncMock(return_value="File response")
+        mock_agent.aclose = AsyncMock()
         mock_agent_class.return_value = mock_agent
 
         # Create temporary file with test content
@@ -83,7 +124,7 @@ class TestCLIMainFunction:
 
             # Verify
             assert result.exit_code == 0
-            mock_agent.process_single_prompt.assert_called_once_with(
+            mock_agent.aprocess_single_prompt.assert_awaited_once_with(
                 "File prompt content"
             )
             assert "Agent: File response" in result.output
@@ -91,6 +132,40 @@ class TestCLIMainFunction:
             # Cleanup
             Path(temp_file_path).unlink()
 
+    @patch("python_agent.cli.load_configuration")
+    @patch("python_agent.agent.Agent")
+    def test_main_file_batch_mode(self, mock_agent_class, mock_load_config):
+        """Test batch mode runs each non-empty file line as a prompt."""
+        mock_load_config.return_value = {"tools_enabled": True}
+        mock_agent = MagicMock()
+        mock_agent.aprocess_batch = AsyncMock(return_value=["One", "Two"])
+        mock_agent.aclose = AsyncMock()
+        mock_agent_class.return_value = mock_agent
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            prompt_file = Path(temp_dir) / "prompts.txt"
+            prompt_file.write_text("first prompt\n\n  second prompt  \n")
+
+            result = self.runner.invoke(
+                main,
+                ["--file", str(prompt_file), "--batch", "--max-concurrency", "3"],
+            )
+
+        assert result.exit_code == 0
+        mock_agent.aprocess_batch.assert_awaited_once_with(
+            ["first prompt", "second prompt"], 3
+        )
+        assert "Agent: One\nAgent: Two" in result.output
+
+    @patch("python_agent.cli.load_configuration")
+    def test_main_batch_requires_file(self, mock_load_config):
+        """Test --batch without --file is rejected."""
+        mock_load_config.return_value = {"tools_enabled": True}
+
+        result = self.runner.invoke(main, ["--prompt", "test", "--batch"])
+
+        assert "Error: --batch requires --file" in result.output
+
     @patch("python_agent.cli.load_configuration")
     @patch("python_agent.agent.Agent")
     @patch("python_agent.session.SessionManager")
@@ -199,6 +274,20 @@ class TestCLIConfigurationHandling:
         # Verify agent was called with updated config
         mock_agent_class.assert_called_once_with(expected_config)
 
+    @patch("python_agent.cli.load_configuration")
+    @patch("python_agent.agent.Agent")
+    def test_main_cli_overrides_cache(self, mock_agent_class, mock_load_config):
+        """Test CLI override for response cache configuration."""
+        mock_config = {"tools_enabled": True, "cache": False}
+        mock_load_config.return_value = mock_config
+        mock_agent_class.return_value = MagicMock()
+
+        result = self.runner.invoke(main, ["--cache"])
+
+        assert result.exit_code == 0
+        passed_config = mock_agent_class.call_args[0][0]
+        assert passed_config["cache"] is True
+
     @patch("python_agent.cli.load_configuration")
     @patch("python_agent.agent.Agent")
     def test_main_verbose_mode(self, mock_agent_class, mock_load_config):
@@ -3,6 +3,7 @@
 Keywords: test, config, configuration, YAML, environment
 """
 
+import dataclasses
 import os
 import tempfile
 from pathlib import Path
@@ -12,6 +13,7 @@ import pytest
 import yaml
 
 from python_agent.config import (
+    AgentConfig,
     ConfigurationError,
     apply_env_overrides,
     get_default_config,
@@ -36,9 +38,50 @@ class TestGetDefaultConfig:
         assert config["temperature"] == 0.7
         assert config["tools_enabled"] is True
         assert config["confirmation_required"] is False
+        assert config["cache"] is False
         assert "sessions" in config["session_dir"]
 
 
+class TestAgentConfig:
+    """Test suite for AgentConfig dataclass."""
+
+    def test_from_dict_fills_defaults(self):
+        """Test missing keys take default values."""
+        config = AgentConfig.from_dict({"model": "custom", "timeout": 5})
+
+        assert config.model == "custom"
+        assert config.timeout == 5
+        assert config.max_tokens == 4000
+        assert config.verbose is False
+
+    def test_from_dict_ignores_legacy_keys(self):
+        """Test options left in older config files are ignored."""
+        config = AgentConfig.from_dict({"model": "x", "confirm_commands": False})
+
+        assert config.model == "x"
+        assert config.get("confirm_commands") is None
+
+    def test_from_dict_rejects_unknown_keys(self):
+        """Test a misspelled option fails instead of being dropped."""
+        with pytest.raises(ConfigurationError, match="max_token"):
+            AgentConfig.from_dict({"model": "x", "max_token": 50})
+
+    def test_config_is_immutable(self):
+        """Test fields cannot be reassigned or added."""
+        config = AgentConfig.from_dict({})
+
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            config.model = "other"  # type: ignore[misc]
+
+    def test_get_shim_and_to_dict(self):
+        """Test dict-style soft lookup and round trip to a dictionary."""
+        config = AgentConfig.from_dict({"quiet": True})
+
+        assert config.get("quiet") is True
+        assert config.get("missing", "default") == "default"
+        assert AgentConfig.from_dict(config.to_dict()) == config
+
+
 class TestLoadConfigFile:
     """Test suite for load_config_file function."""
 
@@ -85,6 +128,30 @@ class TestLoadConfigFile:
         finally:
             temp_path.unlink()
 
+    def test_reuses_parse_for_unchanged_file(self, tmp_path):
+        """Test unchanged file is parsed once and callers get fresh copies."""
+        config_file = tmp_path / "config.yaml"
+        config_file.write_text("model: cached-model\n")
+
+        with patch("yaml.load", wraps=yaml.load) as mock_load:
+            first = load_config_file(config_file)
+            first["model"] = "mutated"
+            second = load_config_file(config_file)
+
+        assert mock_load.call_count == 1
+        assert second == {"model": "cached-model"}
+
+    def test_reparses_modified_file(self, tmp_path):
+        """Test file changes invalidate the memoized parse."""
+        config_file = tmp_path / "config.yaml"
+        config_file.write_text("timeout: 10\n")
+        assert load_config_file(config_file) == {"timeout": 10}
+
+        config_file.write_text("timeout: 200\n")
+        os.utime(config_file, ns=(0, 1_000_000_000))
+
+        assert load_config_file(config_file) == {"timeout": 200}
+
 
 class TestApplyEnvOverrides:
     """Test suite for apply_env_overrides function."""
@@ -151,6 +218,16 @@ class TestApplyEnvOverrides:
 
         assert config["tools_enabled"] is expected
 
+    def test_leaves_config_unchanged_without_relevant_variables(self):
+        """Test unrelated environment variables are ignored."""
+        config = get_default_config()
+        expected = config.copy()
+
+        with patch.dict(os.environ, {"UNRELATED": "value"}, clear=True):
+            apply_env_overrides(config)
+
+        assert config == expected
+
 
 class TestValidateConfig:
     """Test suite for validate_config function."""
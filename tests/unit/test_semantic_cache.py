@@ -0,0 +1,107 @@
+"""Unit tests for semantic cache module.
+
+Keywords: test, semantic, cache, embedding, similarity
+"""
+
+import tempfile
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from python_agent.semantic_cache import SemanticCache, SemanticCacheError
+
+VOCABULARY = ["list", "show", "files", "directory", "weather", "today"]
+SYNONYMS = {"show": "list", "directory": "files"}
+
+
+def bag_of_words(text: str) -> list[float]:
+    """Embed text as word counts over a tiny vocabulary with synonyms."""
+    words = [SYNONYMS.get(w, w) for w in text.lower().split()]
+    return [float(words.count(term)) for term in VOCABULARY]
+
+
+class TestSemanticCacheLookup:
+    """Test suite for SemanticCache lookup and add."""
+
+    def test_lookup_empty_cache_returns_none(self):
+        """Test lookup on an empty cache misses without encoding."""
+        cache = SemanticCache(encoder=bag_of_words)
+
+        assert cache.lookup("list files") is None
+
+    def test_lookup_returns_response_for_similar_prompt(self):
+        """Test rephrased prompt above threshold hits the cache."""
+        cache = SemanticCache(threshold=0.9, encoder=bag_of_words)
+        cache.add("list files", "file1 file2")
+
+        assert cache.lookup("show directory") == "file1 file2"
+
+    def test_lookup_misses_for_dissimilar_prompt(self):
+        """Test unrelated prompt below threshold misses the cache."""
+        cache = SemanticCache(threshold=0.9, encoder=bag_of_words)
+        cache.add("list files", "file1 file2")
+
+        assert cache.lookup("weather today") is None
+
+    def test_lookup_only_matches_same_namespace(self):
+        """Test entries added under one namespace do not serve another."""
+        cache = SemanticCache(encoder=bag_of_words)
+        cache.add("list files", "from model a", namespace="a")
+
+        assert cache.lookup("list files", namespace="b") is None
+        assert cache.lookup("list files", namespace="a") == "from model a"
+
+    def test_max_entries_evicts_oldest(self):
+        """Test cache keeps only the newest max_entries entries."""
+        cache = SemanticCache(encoder=bag_of_words, max_entries=1)
+        cache.add("list files", "old")
+        cache.add("weather today", "new")
+
+        assert len(cache) == 1
+        assert cache.lookup("list files") is None
+        assert cache.lookup("weather today") == "new"
+
+
+class TestSemanticCachePersistence:
+    """Test suite for SemanticCache persistence."""
+
+    def test_entries_persist_across_instances(self):
+        """Test entries written by one cache are loaded by the next."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "cache" / "semantic_cache.jsonl"
+            SemanticCache(path=path, encoder=bag_of_words).add("list files", "ls")
+
+            reloaded = SemanticCache(path=path, encoder=bag_of_words)
+
+            assert len(reloaded) == 1
+            assert reloaded.lookup("show files") == "ls"
+
+    def test_namespaces_persist_across_instances(self):
+        """Test reloaded entries keep the namespace they were added under."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "semantic_cache.jsonl"
+            cache = SemanticCache(path=path, encoder=bag_of_words)
+            cache.add("list files", "ls", namespace="a")
+
+            reloaded = SemanticCache(path=path, encoder=bag_of_words)
+
+            assert reloaded.lookup("list files", namespace="b") is None
+            assert reloaded.lookup("list files", namespace="a") == "ls"
+
+    def test_invalid_cache_file_raises_error(self):
+        """Test corrupt cache file raises SemanticCacheError."""
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = Path(temp_dir) / "semantic_cache.jsonl"
+            path.write_text("{ not json }\n")
+
+            with pytest.raises(SemanticCacheError, match="Failed to load"):
+                SemanticCache(path=path, encoder=bag_of_words)
+
+    def test_missing_sentence_transformers_raises_error(self):
+        """Test default encoder requires sentence-transformers."""
+        with (
+            patch.dict("sys.modules", {"sentence_transformers": None}),
+            pytest.raises(SemanticCacheError, match="sentence-transformers"),
+        ):
+            SemanticCache()
@@ -3,14 +3,24 @@
 Keywords: test, session, persistence, file-based, conversation, history
 """
 
+import asyncio
+import gzip
 import json
+import os
 import tempfile
+import threading
+import time
 from pathlib import Path
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 import pytest
 
-from python_agent.session import Session, SessionError, SessionManager
+from python_agent.session import (
+    AsyncSessionManager,
+    Session,
+    SessionError,
+    SessionManager,
+)
 
 
 class TestSession:
@@ -34,10 +44,7 @@ class TestSession:
 
         # Mock datetime to ensure timestamp differences
         with patch("python_agent.session.datetime") as mock_dt:
-            mock_dt.now.return_value.isoformat.side_effect = [
-                "2023-01-01T10:30:00",
-                "2023-01-01T10:31:00",
-            ]
+            mock_dt.now.return_value.isoformat.return_value = "2023-01-01T10:30:00"
 
             session.add_message("user", "Hello, world!")
 
@@ -45,8 +52,10 @@ class TestSession:
         assert session.messages[0]["role"] == "user"
         assert session.messages[0]["content"] == "Hello, world!"
         assert session.messages[0]["timestamp"] == "2023-01-01T10:30:00"
-        assert session.updated_at == "2023-01-01T10:31:00"
+        # Message timestamp and updated_at share a single clock read
+        assert session.updated_at == "2023-01-01T10:30:00"
         assert session.updated_at != initial_updated_at
+        mock_dt.now.assert_called_once()
 
     def test_add_multiple_messages(self):
         """Test adding multiple messages maintains order."""
@@ -64,6 +73,14 @@ class TestSession:
         assert session.messages[2]["role"] == "tool"
         assert session.messages[2]["content"] == "Third message"
 
+    def test_as_llm_messages_drops_timestamps(self):
+        """Test chat-completion view carries only role and content."""
+        session = Session("test-llm")
+        session.add_message("user", "Hello")
+
+        assert session.as_llm_messages() == [{"role": "user", "content": "Hello"}]
+        assert "timestamp" in session.messages[0]
+
     def test_to_dict_conversion(self):
         """Test session conversion to dictionary."""
         session = Session("test-session")
@@ -168,17 +185,24 @@ class TestSessionManager:
     def mock_home_path(self, temp_sessions_dir):
         """Mock Path.home() to use temporary directory."""
         with patch("python_agent.session.Path.home") as mock_home:
-            # Point home to temp dir so .agent/sessions gets created there
+            # Point home to temp dir with an existing .agent/sessions there
             mock_home.return_value = temp_sessions_dir
+            (temp_sessions_dir / ".agent" / "sessions").mkdir(parents=True)
             yield temp_sessions_dir
 
-    def test_session_manager_initialization(self, mock_home_path):
-        """Test SessionManager initialization creates directory."""
-        manager = SessionManager()
+    def test_session_manager_initialization(self, temp_sessions_dir):
+        """Test SessionManager creates its directory on first save only."""
+        with patch("python_agent.session.Path.home", return_value=temp_sessions_dir):
+            manager = SessionManager()
 
-        expected_sessions_dir = mock_home_path / ".agent" / "sessions"
-        assert manager.sessions_dir == expected_sessions_dir
-        assert expected_sessions_dir.exists()
+            expected_sessions_dir = temp_sessions_dir / ".agent" / "sessions"
+            assert manager.sessions_dir == expected_sessions_dir
+            assert not expected_sessions_dir.exists()
+            assert manager.list_sessions() == []
+
+            manager.save_session(Session("first"))
+
+            assert expected_sessions_dir.exists()
 
     @patch("python_agent.session.load_configuration")
     def test_session_manager_with_custom_config(self, mock_load_config, mock_home_path):
@@ -189,19 +213,33 @@ class TestSessionManager:
 
         manager = SessionManager(config_path)
 
-        mock_load_config.assert_called_once_with(config_path)
+        mock_load_config.assert_not_called()
+        assert manager.config == mock_config
         assert manager.config == mock_config
+        mock_load_config.assert_called_once_with(config_path)
 
     def test_generate_session_id_format(self, mock_home_path):
         """Test session ID generation follows expected format."""
         manager = SessionManager()
+        ns = int(time.mktime((2023, 1, 1, 15, 30, 45, 0, 0, -1))) * 10**9 + 42
 
-        with patch("python_agent.session.datetime") as mock_dt:
-            mock_dt.now.return_value.strftime.return_value = "2023-01-01-15-30-45"
+        with (
+            patch("python_agent.session._last_id_ns", 0),
+            patch("python_agent.session.time.time_ns", return_value=ns),
+        ):
             session_id = manager._generate_session_id()
 
-        assert session_id == "2023-01-01-15-30-45"
-        mock_dt.now.return_value.strftime.assert_called_once_with("%Y-%m-%d-%H-%M-%S")
+        assert session_id == "2023-01-01-15-30-45-000000042"
+
+    def test_generate_session_id_unique_with_frozen_clock(self, mock_home_path):
+        """Test IDs stay unique and ordered when the clock does not advance."""
+        manager = SessionManager()
+
+        with patch("python_agent.session.time.time_ns", return_value=10**18):
+            ids = [manager._generate_session_id() for _ in range(3)]
+
+        assert len(set(ids)) == 3
+        assert ids == sorted(ids)
 
     def test_get_session_path(self, mock_home_path):
         """Test session path generation."""
@@ -210,9 +248,18 @@ class TestSessionManager:
 
         path = manager._get_session_path(session_id)
 
-        expected_path = manager.sessions_dir / "2023-01-01-12-00-00.json"
+        expected_path = manager.sessions_dir / "2023-01-01-12-00-00.jsonl.gz"
         assert path == expected_path
 
+    def test_get_session_path_is_memoized(self, mock_home_path):
+        """Test repeated lookups reuse the same Path object."""
+        manager = SessionManager()
+
+        first = manager._get_session_path("2023-01-01-12-00-00")
+
+        assert manager._get_session_path("2023-01-01-12-00-00") is first
+        assert manager._get_session_path("other") is not first
+
     def test_create_session(self, mock_home_path):
         """Test session creation."""
         manager = SessionManager()
@@ -233,15 +280,18 @@ class TestSessionManager:
 
         manager.save_session(session)
 
-        session_file = manager.sessions_dir / "test-save.json"
+        session_file = manager.sessions_dir / "test-save.jsonl.gz"
         assert session_file.exists()
 
-        with open(session_file) as f:
-            saved_data = json.load(f)
+        with gzip.open(session_file) as f:
+            saved_messages = [json.loads(line) for line in f]
+        with open(manager.sessions_dir / "test-save.meta.json") as f:
+            saved_meta = json.load(f)
 
-        assert saved_data["session_id"] == "test-save"
-        assert len(saved_data["messages"]) == 1
-        assert saved_data["messages"][0]["content"] == "Test message"
+        assert saved_meta["session_id"] == "test-save"
+        assert saved_meta["created_at"] == session.created_at
+        assert len(saved_messages) == 1
+        assert saved_messages[0]["content"] == "Test message"
 
     def test_save_session_file_write_error(self, mock_home_path):
         """Test session save with file write error."""
@@ -253,7 +303,99 @@ class TestSessionManager:
             patch("builtins.open", side_effect=OSError("Permission denied")),
             pytest.raises(SessionError, match="Failed to save session test-error"),
         ):
-                manager.save_session(session)
+            manager.save_session(session)
+
+    def test_save_session_replaces_metadata_atomically(self, mock_home_path):
+        """Test save overwrites metadata via a temp file and leaves none behind."""
+        manager = SessionManager()
+        session = Session("test-atomic")
+        manager.save_session(session)
+        session.add_message("user", "Second save")
+
+        with patch("python_agent.session.os.replace", wraps=os.replace) as replace:
+            manager.save_session(session)
+
+        meta_file = manager.sessions_dir / "test-atomic.meta.json"
+        replace.assert_called_once_with(
+            manager.sessions_dir / "test-atomic.meta.json.tmp", meta_file
+        )
+        assert json.loads(meta_file.read_text())["updated_at"] == session.updated_at
+        assert not list(manager.sessions_dir.glob("*.tmp"))
+        assert manager.list_sessions() == ["test-atomic"]
+
+    def test_save_session_appends_only_new_messages(self, mock_home_path):
+        """Test repeated saves append new messages instead of rewriting."""
+        manager = SessionManager()
+        session = Session("test-append")
+        session.add_message("user", "Hello")
+        manager.save_session(session)
+        session_file = manager.sessions_dir / "test-append.jsonl.gz"
+        first = session_file.read_bytes()
+        session.add_message("assistant", "Hi")
+        session.add_message("user", "Bye")
+
+        manager.save_session(session)
+        manager.save_session(session)
+
+        data = session_file.read_bytes()
+        entries = [json.loads(line) for line in gzip.decompress(data).splitlines()]
+        assert data.startswith(first)
+        assert [e["index"] for e in entries] == [0, 1, 2]
+        assert session._persisted_count == 3
+
+    def test_save_session_migrates_legacy_snapshot(self, mock_home_path):
+        """Test a legacy JSON snapshot is replaced by the log on next save."""
+        manager = SessionManager()
+        legacy = Session("test-legacy")
+        legacy.add_message("user", "Old")
+        legacy_file = manager.sessions_dir / "test-legacy.json"
+        legacy_file.write_text(json.dumps(legacy.to_dict()))
+
+        session = manager.load_session("test-legacy")
+        session.add_message("assistant", "New")
+
+        def check_legacy(path):
+            assert path == manager.sessions_dir
+            assert legacy_file.exists()
+
+        with patch(
+            "python_agent.session._fsync_dir", side_effect=check_legacy
+        ) as fsync_dir:
+            manager.save_session(session)
+
+        fsync_dir.assert_called_once()
+        assert not legacy_file.exists()
+        loaded = manager.load_session("test-legacy")
+        assert [m["content"] for m in loaded.messages] == ["Old", "New"]
+        assert loaded.created_at == legacy.created_at
+
+    @pytest.mark.parametrize("has_orjson", [True, False])
+    def test_save_and_load_round_trip_with_either_codec(
+        self, mock_home_path, has_orjson
+    ):
+        """Test sessions round-trip with orjson and the stdlib fallback."""
+        if has_orjson:
+            pytest.importorskip("orjson")
+        manager = SessionManager()
+        session = Session("test-codec")
+        session.add_message("user", "Héllo ✓")
+        manager.save_session(session)
+        session.add_message("assistant", "Hi")
+        manager.append_message(session)
+
+        with patch("python_agent.session.HAS_ORJSON", has_orjson):
+            manager.save_session(session)
+            session.add_message("user", "Again")
+            manager.append_message(session)
+            loaded = manager.load_session("test-codec")
+
+        assert loaded.messages == session.messages
+        raw = gzip.decompress(
+            (manager.sessions_dir / "test-codec.jsonl.gz").read_bytes()
+        ).decode("utf-8")
+        meta = (manager.sessions_dir / "test-codec.meta.json").read_text()
+        assert "Héllo ✓" in raw
+        assert '\n  "session_id"' in meta
 
     def test_load_session_success(self, mock_home_path):
         """Test successful session loading."""
@@ -309,7 +451,7 @@ class TestSessionManager:
             patch("builtins.open", side_effect=OSError("Permission denied")),
             pytest.raises(SessionError, match="Failed to load session read-error"),
         ):
-                manager.load_session("read-error")
+            manager.load_session("read-error")
 
     def test_list_sessions_empty(self, mock_home_path):
         """Test listing sessions when directory is empty."""
@@ -355,6 +497,29 @@ class TestSessionManager:
         assert set(sessions) == set(expected)
         assert len(sessions) == 2
 
+    def test_list_sessions_ignores_directories(self, mock_home_path):
+        """Test listing sessions skips directories with session suffixes."""
+        manager = SessionManager()
+        (manager.sessions_dir / "session1.jsonl.gz").touch()
+        (manager.sessions_dir / "backup.json").mkdir()
+
+        assert manager.list_sessions() == ["session1"]
+
+    def test_list_sessions_reuses_index_until_directory_changes(self, mock_home_path):
+        """Test repeat listings skip the directory scan until it changes."""
+        manager = SessionManager()
+        (manager.sessions_dir / "session1.jsonl.gz").touch()
+
+        with patch("python_agent.session.os.scandir", wraps=os.scandir) as scandir:
+            assert manager.list_sessions() == ["session1"]
+            assert manager.list_sessions() == ["session1"]
+            assert scandir.call_count == 1
+
+            manager.save_session(Session("session2"))
+
+            assert manager.list_sessions() == ["session2", "session1"]
+            assert scandir.call_count == 2
+
     def test_session_exists_true(self, mock_home_path):
         """Test session_exists returns True for existing session."""
         manager = SessionManager()
@@ -365,6 +530,13 @@ class TestSessionManager:
 
         assert result is True
 
+    def test_session_exists_ignores_directories(self, mock_home_path):
+        """Test a directory named like a session file is not a session."""
+        manager = SessionManager()
+        (manager.sessions_dir / "not-a-session.jsonl.gz").mkdir()
+
+        assert manager.session_exists("not-a-session") is False
+
     def test_session_exists_false(self, mock_home_path):
         """Test session_exists returns False for non-existent session."""
         manager = SessionManager()
@@ -373,6 +545,262 @@ class TestSessionManager:
 
         assert result is False
 
+    def test_append_message_writes_log_lines(self, mock_home_path):
+        """Test append_message writes only the newest message."""
+        manager = SessionManager()
+        session = Session("test-log")
+        session.add_message("user", "Hello")
+        manager.append_message(session)
+        session.add_message("assistant", "Hi")
+        manager.append_message(session)
+
+        log = manager.sessions_dir / "test-log.jsonl.gz"
+        with gzip.open(log) as f:
+            entries = [json.loads(line) for line in f]
+
+        assert [e["index"] for e in entries] == [0, 1]
+        assert [e["content"] for e in entries] == ["Hello", "Hi"]
+        assert not (manager.sessions_dir / "test-log.meta.json").exists()
+
+    def test_save_session_syncs_log_after_unsynced_appends(self, mock_home_path):
+        """Test save_session fsyncs a log whose appends were not yet synced."""
+        manager = SessionManager()
+        session = Session("test-sync")
+        session.add_message("user", "Hello")
+        manager.save_session(session)
+        session.add_message("assistant", "Hi")
+        manager.append_message(session)
+        session.add_message("user", "Bye")
+        manager.append_message(session)
+        synced = []
+        real_fsync = os.fsync
+
+        def record_fsync(fd):
+            synced.append(os.fstat(fd).st_ino)
+            real_fsync(fd)
+
+        with patch("python_agent.session.os.fsync", side_effect=record_fsync):
+            manager.save_session(session)
+            manager.save_session(session)
+
+        log_inode = (manager.sessions_dir / "test-sync.jsonl.gz").stat().st_ino
+        assert synced.count(log_inode) == 1
+
+    def test_append_message_compacts_log_periodically(self, mock_home_path):
+        """Test per-message appends are folded back into few gzip members."""
+        manager = SessionManager()
+        session = Session("test-compact")
+        for i in range(40):
+            session.add_message("user", f"message number {i}")
+            manager.append_message(session)
+
+        log = manager.sessions_dir / "test-compact.jsonl.gz"
+        plain = gzip.decompress(log.read_bytes())
+        assert log.read_bytes().count(b"\x1f\x8b\x08") < 16
+        assert log.stat().st_size * 2 < len(plain)
+        assert manager.load_session("test-compact").messages == session.messages
+
+    def test_load_session_replays_log(self, mock_home_path):
+        """Test load combines saved and appended messages."""
+        manager = SessionManager()
+        session = Session("test-replay")
+        session.add_message("user", "Hello")
+        manager.save_session(session)
+        session.add_message("assistant", "Hi")
+        manager.append_message(session)
+        session.add_message("user", "Bye")
+        manager.append_message(session)
+
+        loaded = manager.load_session("test-replay")
+
+        assert [m["content"] for m in loaded.messages] == ["Hello", "Hi", "Bye"]
+        assert loaded.created_at == session.created_at
+        assert loaded.updated_at == session.updated_at
+        assert loaded._persisted_count == 3
+        assert manager.list_sessions() == ["test-replay"]
+
+    def test_load_session_skips_entries_in_legacy_snapshot(self, mock_home_path):
+        """Test log entries already in a legacy snapshot are not duplicated."""
+        manager = SessionManager()
+        session = Session("test-overlap")
+        session.add_message("user", "Hello")
+        manager.append_message(session)
+        (manager.sessions_dir / "test-overlap.json").write_text(
+            json.dumps(session.to_dict())
+        )
+
+        loaded = manager.load_session("test-overlap")
+
+        assert [m["content"] for m in loaded.messages] == ["Hello"]
+
+    def test_load_session_ignores_torn_last_member(self, mock_home_path):
+        """Test a torn append is dropped and rewritten by the next save."""
+        manager = SessionManager()
+        session = Session("test-torn")
+        session.add_message("user", "Hello")
+        manager.save_session(session)
+        log = manager.sessions_dir / "test-torn.jsonl.gz"
+        member = gzip.compress(b'{"index": 1, "role": "assistant"}\n')
+        with open(log, "ab") as f:
+            f.write(member[:-6])
+
+        loaded = manager.load_session("test-torn")
+        loaded.add_message("assistant", "Hi")
+        manager.save_session(loaded)
+
+        assert [m["content"] for m in loaded.messages] == ["Hello", "Hi"]
+        reloaded = manager.load_session("test-torn")
+        assert reloaded.messages == loaded.messages
+
+    def test_load_session_corrupt_log_raises_error(self, mock_home_path):
+        """Test a corrupt compressed log raises SessionError."""
+        manager = SessionManager()
+        (manager.sessions_dir / "test-corrupt.jsonl.gz").write_bytes(
+            b"\x1f\x8b not gzip"
+        )
+
+        with pytest.raises(SessionError, match="Failed to load session test-corrupt"):
+            manager.load_session("test-corrupt")
+
+    def test_load_session_streams_multi_member_log(self, mock_home_path):
+        """Test a log split into many members loads through small reads."""
+        manager = SessionManager()
+        session = Session("test-stream")
+        for i in range(5):
+            session.add_message("user", f"message {i}")
+
+        with (
+            patch("python_agent.session.LOG_MEMBER_SIZE", 1),
+            patch("python_agent.session.LOAD_CHUNK_SIZE", 7),
+        ):
+            manager.save_session(session)
+            loaded = manager.load_session("test-stream")
+
+        log = manager.sessions_dir / "test-stream.jsonl.gz"
+        assert log.read_bytes().count(b"\x1f\x8b\x08") == 5
+        assert loaded.messages == session.messages
+        assert loaded._persisted_count == 5
+
+    def test_session_exists_for_log_only(self, mock_home_path):
+        """Test session with only appended messages is found and loadable."""
+        manager = SessionManager()
+        session = Session("test-unsaved")
+        session.add_message("user", "Hello")
+        manager.append_message(session)
+
+        assert manager.session_exists("test-unsaved") is True
+        loaded = manager.load_session("test-unsaved")
+        assert loaded.messages[0]["content"] == "Hello"
+        assert loaded.created_at == session.messages[0]["timestamp"]
+
+
+class TestSessionManagerBackgroundSaves:
+    """Test suite for SessionManager debounced background saves."""
+
+    @pytest.fixture
+    def mock_home_path(self):
+        """Point Path.home() at a temporary directory."""
+        with (
+            tempfile.TemporaryDirectory() as temp_dir,
+            patch("python_agent.session.Path.home", return_value=Path(temp_dir)),
+        ):
+            yield Path(temp_dir)
+
+    def test_schedule_save_coalesces_requests(self, mock_home_path):
+        """Test saves scheduled within the debounce window write once."""
+        manager = SessionManager(debounce_seconds=0)
+        session = Session("test-debounce")
+        release = threading.Event()
+
+        with (
+            patch("python_agent.session.time.sleep", lambda _: release.wait(5)),
+            patch.object(
+                manager, "save_session", wraps=manager.save_session
+            ) as mock_save,
+        ):
+            for content in ["one", "two", "three"]:
+                session.add_message("user", content)
+                manager.schedule_save(session)
+            release.set()
+            manager.flush()
+
+        mock_save.assert_called_once_with(session)
+        loaded = manager.load_session("test-debounce")
+        assert [m["content"] for m in loaded.messages] == ["one", "two", "three"]
+        manager.close()
+
+    def test_flush_raises_background_save_error(self, mock_home_path):
+        """Test a failed background save is reported once by flush."""
+        manager = SessionManager(debounce_seconds=0)
+        manager.save_session = Mock(side_effect=SessionError("disk full"))
+
+        manager.schedule_save(Session("test-error"))
+
+        with pytest.raises(SessionError, match="disk full"):
+            manager.flush()
+        manager.flush()
+        manager.close()
+
+    def test_close_writes_pending_saves_and_stops_writer(self, mock_home_path):
+        """Test close drains the queue before the writer thread exits."""
+        manager = SessionManager(debounce_seconds=0)
+        session = Session("test-close")
+        session.add_message("user", "Hello")
+
+        manager.schedule_save(session)
+        writer = manager._writer
+        manager.close()
+
+        assert writer is not None and not writer.is_alive()
+        assert manager.session_exists("test-close")
+        assert manager.load_session("test-close").messages == session.messages
+
+
+class TestAsyncSessionManager:
+    """Test suite for AsyncSessionManager."""
+
+    @pytest.fixture
+    def mock_home_path(self):
+        """Point Path.home() at a temporary directory."""
+        with (
+            tempfile.TemporaryDirectory() as temp_dir,
+            patch("python_agent.session.Path.home", return_value=Path(temp_dir)),
+        ):
+            yield Path(temp_dir)
+
+    def test_save_and_load_round_trip(self, mock_home_path):
+        """Test async save and load match the synchronous format."""
+        manager = AsyncSessionManager()
+        session = Session("test-async")
+        session.add_message("user", "Hello")
+
+        async def run():
+            await manager.save_session(session)
+            session.add_message("assistant", "Hi")
+            await manager.append_message(session)
+            return await manager.load_session("test-async")
+
+        loaded = asyncio.run(run())
+
+        assert loaded.messages == session.messages
+        assert SessionManager().load_session("test-async").messages == (
+            session.messages
+        )
+
+    def test_save_sessions_uses_one_worker_call(self, mock_home_path):
+        """Test a batch of saves is written from a single thread hop."""
+        manager = AsyncSessionManager()
+        sessions = [Session("test-a"), Session("test-b")]
+
+        with patch(
+            "python_agent.session.asyncio.to_thread", wraps=asyncio.to_thread
+        ) as to_thread:
+            asyncio.run(manager.save_sessions(sessions))
+            ids = asyncio.run(manager.list_sessions())
+
+        assert to_thread.call_count == 2  # one batch save, one listing
+        assert ids == ["test-b", "test-a"]
+
 
 class TestSessionIntegration:
     """Integration tests for session functionality."""